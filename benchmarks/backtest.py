@@ -0,0 +1,105 @@
+"""Rolling-origin backtest of the forecasting engines (OLS, SARIMAX, XGBoost, Prophet).
+
+Run from the repo root:
+
+    python -m benchmarks.backtest --workers 3
+
+Every (engine, dataset) pair runs in its own process and reports MAPE/RMSE
+together with total fit time, total predict time and peak traced memory.
+"""
+import time
+import argparse
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from forecasting import ENGINES
+from metrics import load_performance_data, split_penyaluran, monthly_timeline
+from daily_performance import load_daily_performance
+
+# name -> (period, horizon, first origin, step)
+DATASETS = {
+    "monthly": (12, 3, 15, 1),
+    "daily": (7, 30, 365, 30),
+}
+
+
+def monthly_series():
+    """Monthly revenue of every year up to the last realized month, without Penyaluran Dana"""
+    facts_excl, _ = split_penyaluran(load_performance_data())
+    revenue = monthly_timeline(facts_excl)["Kinerja"].to_numpy()
+    return revenue[:np.flatnonzero(revenue > 0)[-1] + 1]
+
+
+def daily_series():
+    """Total daily revenue from data/performance.csv"""
+    daily = load_daily_performance()
+    return daily.groupby("date")["Revenue"].sum().sort_index().to_numpy()
+
+
+SERIES = {"monthly": monthly_series, "daily": daily_series}
+
+
+def rolling_origin(y, fit, predict, period, horizon, first_origin, step):
+    """Refit at every origin and score the next `horizon` points"""
+    errors, actuals = [], []
+    fit_s = predict_s = 0.0
+    for origin in range(first_origin, len(y) - horizon + 1, step):
+        started = time.perf_counter()
+        state = fit(y[:origin], period)
+        fit_s += time.perf_counter() - started
+
+        started = time.perf_counter()
+        pred = predict(state, horizon)
+        predict_s += time.perf_counter() - started
+
+        actual = y[origin:origin + horizon]
+        errors.append(pred - actual)
+        actuals.append(actual)
+
+    errors, actuals = np.concatenate(errors), np.concatenate(actuals)
+    nonzero = actuals != 0
+    return {
+        "origins": len(range(first_origin, len(y) - horizon + 1, step)),
+        "mape": float(np.mean(np.abs(errors[nonzero] / actuals[nonzero])) * 100),
+        "rmse": float(np.sqrt(np.mean(errors ** 2))),
+        "fit_s": fit_s,
+        "predict_s": predict_s,
+    }
+
+
+def run_job(engine, dataset):
+    period, horizon, first_origin, step = DATASETS[dataset]
+    y = SERIES[dataset]()
+    fit, predict = ENGINES[engine]
+
+    tracemalloc.start()
+    result = rolling_origin(y, fit, predict, period, horizon, first_origin, step)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"engine": engine, "dataset": dataset, **result, "peak_mb": peak / 2 ** 20}
+
+
+def run_backtest(engines=None, datasets=None, workers=None):
+    jobs = [(e, d) for e in (engines or ENGINES) for d in (datasets or DATASETS)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run_job, *zip(*jobs)))
+    return pd.DataFrame(results).sort_values(["dataset", "mape"]).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--engines", nargs="*", choices=list(ENGINES))
+    parser.add_argument("--datasets", nargs="*", choices=list(DATASETS))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", help="optional CSV path for the report")
+    args = parser.parse_args()
+
+    report = run_backtest(args.engines, args.datasets, args.workers)
+    with pd.option_context("display.float_format", "{:,.3f}".format, "display.width", 120):
+        print(report.to_string(index=False))
+    if args.out:
+        report.to_csv(args.out, index=False)
@@ -0,0 +1,142 @@
+"""LLM gateway against a local stub server: coalescing, rate limit and retries.
+
+Run from the repo root (standard library only, no API key):
+
+    python -m benchmarks.llm_stub --sessions 20 --distinct 4 --rate 120 --error-rate 0.2
+
+Starts an OpenAI-compatible stub that answers after `--latency` seconds and
+rejects a share of requests with 429 + Retry-After, then fires one question
+per simulated session at the same moment (`--distinct` different questions
+among them). Prints the gateway metrics next to what the stub received and
+exits non-zero if the two disagree or a request failed.
+"""
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_gateway import LLMGateway
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    latency_s = 0.5
+    error_rate = 0.0
+    retry_after_s = 0.2
+    received = {"ok": 0, "rejected": 0}
+    lock = threading.Lock()
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if random.random() < self.error_rate:
+            with self.lock:
+                self.received["rejected"] += 1
+            self.send_response(429)
+            self.send_header("Retry-After", str(self.retry_after_s))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        time.sleep(self.latency_s)
+        with self.lock:
+            self.received["ok"] += 1
+        body = json.dumps({
+            "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": request["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": f"Stub answer to: {request['messages'][-1]['content']}"}}],
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubHTTPError(Exception):
+    def __init__(self, status_code, headers):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.headers = headers
+
+
+def http_create(base_url):
+    """A chat.completions.create stand-in posting to `base_url` with urllib"""
+    def create(**request):
+        http_request = urllib.request.Request(
+            f"{base_url}/chat/completions", data=json.dumps(request).encode(),
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        try:
+            with urllib.request.urlopen(http_request, timeout=30) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            raise StubHTTPError(e.code, dict(e.headers)) from None
+    return create
+
+
+def start_stub(latency_s, error_rate):
+    StubLLMHandler.latency_s = latency_s
+    StubLLMHandler.error_rate = error_rate
+    StubLLMHandler.received = {"ok": 0, "rejected": 0}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubLLMHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/openai/v1"
+
+
+def run(sessions, distinct, rate, burst, latency, error_rate):
+    server, url = start_stub(latency, error_rate)
+    gateway = LLMGateway(http_create(url), rate_per_minute=rate, burst=burst, base_delay=0.1, max_retries=6)
+    questions = [f"How did category {i} perform this month?" for i in range(distinct)]
+
+    def session(i):
+        # whitespace differs per session; the gateway still treats the questions as identical
+        content = questions[i % distinct] + " " * (i % 3)
+        try:
+            return gateway.complete(model="stub", messages=[{"role": "user", "content": content}])
+        except StubHTTPError:
+            return None  # retries exhausted; counted in the gateway's failures
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            answers = [a for a in pool.map(session, range(sessions)) if a is not None]
+    finally:
+        server.shutdown()
+    return gateway.stats(), dict(StubLLMHandler.received), len(answers), time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--distinct", type=int, default=4, help="different questions among the sessions")
+    parser.add_argument("--rate", type=float, default=120, help="gateway requests per minute")
+    parser.add_argument("--burst", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub response delay (s)")
+    parser.add_argument("--error-rate", type=float, default=0.2, help="share of stub requests answered 429")
+    args = parser.parse_args()
+
+    stats, received, answered, elapsed = run(
+        args.sessions, args.distinct, args.rate, args.burst, args.latency, args.error_rate
+    )
+    print(f"{answered} sessions answered in {elapsed:.2f}s")
+    print("gateway: " + ", ".join(f"{key}={value}" for key, value in stats.items()))
+    print(f"stub:    ok={received['ok']}, rejected (429)={received['rejected']}")
+
+    problems = []
+    if stats["upstream_calls"] != received["ok"] + received["rejected"]:
+        problems.append("upstream calls do not match the requests the stub received")
+    if stats["retries"] != received["rejected"] - stats["failures"]:
+        problems.append("a 429 was neither retried nor reported as a failure")
+    if stats["failures"]:
+        problems.append(f"{stats['failures']} request(s) failed")
+    if received["ok"] > args.distinct:
+        problems.append(f"{received['ok']} answered upstream calls for {args.distinct} distinct questions")
+    print("\n".join(f"FAIL: {p}" for p in problems) or "OK")
+    raise SystemExit(1 if problems else 0)
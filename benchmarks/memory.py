@@ -0,0 +1,104 @@
+"""Per-session memory of the Monthly Performance filter path, before vs after compact dtypes.
+
+Run from the repo root:
+
+    python -m benchmarks.memory --scale 100 --sessions 10
+
+Writes a synthetic performance CSV at `scale` x today's size, then for each
+variant measures the loaded frame (memory_usage(deep=True)) and the peak
+traced allocation of one rerun's filter + aggregation path. "Per session" is
+what each additional session adds: the before variant reads and copies its
+own frame on every rerun, the after variant shares one read-only frame.
+"""
+import os
+import argparse
+import tempfile
+import tracemalloc
+
+import pandas as pd
+
+from metrics import PENYALURAN_CATS, MONTH_MAP, load_performance_data, get_metrics, monthly_timeline, split_penyaluran
+from benchmarks.synthetic import performance_frame
+
+
+# ------------------------------------------------------------------
+# Before: default dtypes and the copies the tab used to make
+# ------------------------------------------------------------------
+def before_path(path, selected):
+    df = pd.read_csv(path)
+    df_excl = df[~df["Categori Produk"].isin(PENYALURAN_CATS)].copy()
+    df_incl = df.copy()
+    df_excl = df_excl[df_excl["Categori Produk"].isin(selected)]
+    df_incl = df_incl[df_incl["Categori Produk"].isin(selected + PENYALURAN_CATS)]
+
+    monthly_agg = df_excl.groupby("bulan").agg({
+        "Kinerja 2024": "sum", "Kinerja 2025": "sum", "Target Tahun Ini": "sum"
+    }).reset_index()
+    monthly_agg["bulan_name"] = monthly_agg["bulan"].map(MONTH_MAP)
+    df_2024 = monthly_agg[["bulan", "bulan_name", "Kinerja 2024"]].copy()
+    df_2025 = monthly_agg[["bulan", "bulan_name", "Kinerja 2025", "Target Tahun Ini"]].copy()
+    timeline = pd.concat([df_2024, df_2025], ignore_index=True)
+    train = timeline[timeline["bulan"] <= 8]
+    monthly_2025 = timeline[timeline["Kinerja 2025"].notna()]
+    pd_rows = df[df["Categori Produk"].isin(PENYALURAN_CATS)]
+    return df, (df_excl, df_incl, timeline, train, monthly_2025, pd_rows)
+
+
+# ------------------------------------------------------------------
+# After: compact fact table, masks / index arrays, one shared frame
+# ------------------------------------------------------------------
+def after_path(facts, selected):
+    facts_excl, facts_incl = split_penyaluran(facts, selected)
+    return facts, (get_metrics(facts_excl), get_metrics(facts_incl), monthly_timeline(facts_excl))
+
+
+def frame_mb(df):
+    return df.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def traced_peak_mb(fn, *args):
+    tracemalloc.start()
+    try:
+        result = fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak / 2 ** 20
+
+
+def run(scale, sessions):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "performance.csv")
+        synthetic = performance_frame(scale)
+        synthetic.to_csv(path, index=False)
+        categories = [c for c in synthetic["Categori Produk"].unique() if c not in PENYALURAN_CATS]
+        selected = categories[: len(categories) // 2]
+
+        (df_before, _), before_peak = traced_peak_mb(before_path, path, selected)
+        shared = load_performance_data(path)
+        (df_after, _), after_peak = traced_peak_mb(after_path, shared, selected)
+
+    rows = [
+        {"variant": "before", "rows": len(df_before), "frame_mb": frame_mb(df_before),
+         "rerun_peak_mb": before_peak,
+         # every session holds its own frame plus the rerun's working set
+         f"{sessions}_sessions_mb": sessions * before_peak},
+        {"variant": "after", "rows": len(df_after), "frame_mb": frame_mb(df_after),
+         "rerun_peak_mb": after_peak,
+         # one shared frame, each session only the rerun's working set
+         f"{sessions}_sessions_mb": frame_mb(df_after) + sessions * after_peak},
+    ]
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--sessions", type=int, default=10)
+    args = parser.parse_args()
+
+    report = run(args.scale, args.sessions)
+    with pd.option_context("display.float_format", "{:,.2f}".format):
+        print(report.to_string(index=False))
+    before, after = report["rerun_peak_mb"]
+    print(f"\nper-session reduction: {before / after:,.1f}x" if after > 0 else "")
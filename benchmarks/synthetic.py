@@ -0,0 +1,93 @@
+"""Synthetic datasets shaped like the dashboard inputs, at a multiple of today's size.
+
+scale=1 matches the current files (23 categories x 12 months of performance,
+~90 tasks); scale=10 and scale=100 repeat the category list / task list with
+fresh random values, keeping column names, dtypes and value ranges.
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from facts import PERFORMANCE_FILE, to_fact_table, wide_to_facts
+from metrics import PENYALURAN_CATS, load_performance_data
+from tasks import TASK_FILE
+
+UNITS = ["Fund Distribution", "Payment", "Fronting", "MCFS", "Resya",
+         "Marketing", "DGPS", "Product Management", "not assigned"]
+STATUSES = ["Not Started", "In Progress", "Completed"]
+
+
+def _base_categories():
+    try:
+        return sorted(load_performance_data(PERFORMANCE_FILE).index.get_level_values("category").unique())
+    except FileNotFoundError:
+        return [f"{i}. CATEGORY {i}" for i in range(1, 21)] + PENYALURAN_CATS
+
+
+def performance_frame(scale=1, seed=0):
+    """Monthly performance (bulan x Categori Produk) with 2024/2025 revenue and targets"""
+    rng = np.random.default_rng(seed)
+    base = _base_categories()
+    categories = [
+        name if copy == 0 else f"{name} #{copy + 1}"
+        for copy in range(scale) for name in base
+        if copy == 0 or name not in PENYALURAN_CATS
+    ]
+    n = len(categories)
+    level = rng.lognormal(8, 1.2, size=n)
+    months = np.arange(1, 13)
+    season = 1 + 0.15 * np.sin(2 * np.pi * (months - 1) / 12)
+
+    df = pd.DataFrame({
+        "bulan": np.repeat(months, n),
+        "Categori Produk": np.tile(categories, 12),
+    })
+    scale_rows = np.tile(level, 12) * np.repeat(season, n)
+    df["Kinerja 2024"] = scale_rows * rng.normal(1.0, 0.1, len(df))
+    df["Kinerja 2025"] = df["Kinerja 2024"] * rng.normal(1.05, 0.1, len(df))
+    df["Target Tahun Ini"] = df["Kinerja 2024"] * 1.1
+    df["growth"] = (df["Kinerja 2025"] / df["Kinerja 2024"] - 1) * 100
+    df["achievement"] = df["Kinerja 2025"] / df["Target Tahun Ini"] * 100
+    return df
+
+
+def performance_facts(scale=1, seed=0):
+    """`performance_frame` as the (year, month, category) fact table the dashboard loads"""
+    return to_fact_table(wide_to_facts(performance_frame(scale, seed)))
+
+
+def _base_task_count():
+    try:
+        return len(pd.read_csv(TASK_FILE))
+    except FileNotFoundError:
+        return 90
+
+
+def tasks_frame(scale=1, seed=0, today=None):
+    """Task table with shared units ("A & B"), missing due dates and mixed statuses"""
+    rng = np.random.default_rng(seed)
+    today = today or datetime.date.today()
+    n = _base_task_count() * scale
+
+    first = rng.choice(UNITS, n)
+    second = rng.choice(UNITS, n)
+    shared = rng.random(n) < 0.2
+    assigned = np.where(shared & (first != second), np.char.add(np.char.add(first, " & "), second), first)
+
+    start = pd.Timestamp(today) - pd.to_timedelta(rng.integers(0, 180, n), unit="D")
+    due = start + pd.to_timedelta(rng.integers(5, 120, n), unit="D")
+    due = due.where(rng.random(n) > 0.05)
+
+    return pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "task_name": [f"Task {i} proyek bisnis {UNITS[i % len(UNITS)].lower()}" for i in range(n)],
+        "assigned_unit": assigned,
+        "start_date": start.date,
+        "due_date": due.date,
+        "status": rng.choice(STATUSES, n, p=[0.2, 0.5, 0.3]),
+        "follow_up": "",
+        "completed_activities": "",
+        "pending_activities": "",
+        "last_updated": pd.Timestamp(today),
+    })
@@ -0,0 +1,119 @@
+"""pytest-benchmark suite for the dashboard's analytics core at 1x / 10x / 100x data.
+
+Needs `pip install pytest pytest-benchmark`. Run from the repo root:
+
+    python -m pytest benchmarks/test_analytics.py --benchmark-only
+    python -m pytest benchmarks/test_analytics.py --benchmark-autosave          # store a baseline
+    python -m pytest benchmarks/test_analytics.py --benchmark-compare --benchmark-compare-fail=mean:20%
+
+Benchmarks are grouped per function, so each group compares the scales.
+"""
+import datetime
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from metrics import (
+    N_BOOT, get_metrics, split_penyaluran, monthly_timeline, forecast_paths, forecast_timeline, performance_artifacts
+)
+from redistribution import redistribution_cube, category_breakdown
+from tasks import expand_units, filter_tasks, status_counts, tasks_by_unit, task_alerts, unit_workload
+from benchmarks.synthetic import UNITS, STATUSES, performance_facts, tasks_frame
+
+SCALES = [1, 10, 100]
+TODAY = datetime.date(2025, 9, 15)
+
+
+@pytest.fixture(scope="module", params=SCALES, ids=[f"{s}x" for s in SCALES])
+def performance(request):
+    return performance_facts(request.param)
+
+
+@pytest.fixture(scope="module", params=SCALES, ids=[f"{s}x" for s in SCALES])
+def tasks(request):
+    return tasks_frame(request.param, today=TODAY)
+
+
+# ------------------------------------------------------------------
+# Monthly performance
+# ------------------------------------------------------------------
+@pytest.mark.benchmark(group="get_metrics")
+def test_get_metrics(benchmark, performance):
+    facts_excl, _ = split_penyaluran(performance)
+    result = benchmark(get_metrics, facts_excl)
+    assert result["ytd_target"] > 0
+
+
+@pytest.mark.benchmark(group="forecast_timeline")
+def test_forecast_timeline(benchmark, performance):
+    facts_excl, _ = split_penyaluran(performance)
+    timeline, forecast_df = benchmark(lambda: forecast_timeline(monthly_timeline(facts_excl)))
+    assert len(forecast_df) == 4
+
+
+@pytest.mark.benchmark(group="forecast_paths")
+def test_forecast_paths(benchmark, performance):
+    facts_excl, _ = split_penyaluran(performance)
+    timeline = monthly_timeline(facts_excl)
+    paths = benchmark(forecast_paths, timeline)
+    assert paths.shape == (4, N_BOOT)
+
+
+@pytest.mark.benchmark(group="performance_artifacts")
+def test_performance_artifacts(benchmark, performance):
+    result = benchmark(performance_artifacts, performance)
+    projection = result["projection"]
+    assert projection["total_proj_excl_p10"] <= projection["total_proj_excl_p50"] <= projection["total_proj_excl_p90"]
+
+
+# ------------------------------------------------------------------
+# Target redistribution
+# ------------------------------------------------------------------
+@pytest.mark.benchmark(group="redistribution_cube")
+def test_redistribution_cube(benchmark, performance):
+    cube = benchmark(redistribution_cube, performance)
+    assert cube["redistributed"].shape[0] == performance.index.get_level_values("category").nunique()
+
+
+@pytest.mark.benchmark(group="category_breakdown")
+def test_category_breakdown(benchmark, performance):
+    cube = redistribution_cube(performance)
+    categories = cube["categories"][::2]
+    benchmark(category_breakdown, cube, 8, categories)
+
+
+# ------------------------------------------------------------------
+# Tasks
+# ------------------------------------------------------------------
+@pytest.mark.benchmark(group="expand_units")
+def test_expand_units(benchmark, tasks):
+    expanded = benchmark(expand_units, tasks)
+    assert len(expanded) >= len(tasks)
+
+
+@pytest.mark.benchmark(group="filter_tasks")
+def test_filter_tasks(benchmark, tasks):
+    filtered = benchmark(filter_tasks, tasks, STATUSES[:2], UNITS[:4], "proyek")
+    assert len(filtered) <= len(tasks)
+
+
+@pytest.mark.benchmark(group="task_overview")
+def test_task_overview(benchmark, tasks):
+    def overview():
+        return status_counts(tasks), tasks_by_unit(expand_units(tasks))
+
+    counts, _ = benchmark(overview)
+    assert counts["total"] == len(tasks)
+
+
+@pytest.mark.benchmark(group="task_alerts")
+def test_task_alerts(benchmark, tasks):
+    alerts = benchmark(task_alerts, tasks, TODAY)
+    assert set(alerts) == {"close_to_deadline", "overdue", "unconfirmed"}
+
+
+@pytest.mark.benchmark(group="unit_workload")
+def test_unit_workload(benchmark, tasks):
+    workload = benchmark(unit_workload, tasks, "D")
+    assert workload.to_numpy().max() <= len(tasks)
@@ -0,0 +1,89 @@
+RECENT_TURNS = 6          # user/assistant pairs kept verbatim
+FOLD_TURNS = 3            # turns past the window folded into the summary at once (one summarizer call)
+ARCHIVE_LIMIT = 40        # older messages kept for the "load older" control
+OLDER_PAGE_SIZE = 10
+HISTORY_TOKEN_CAP = 1500  # budget for summary + recent turns sent to the LLM
+SUMMARY_CHAR_LIMIT = 2000
+
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+def init_chat_state(state):
+    """Make sure the session holds every key the conversation manager uses"""
+    state.setdefault("messages", [])
+    state.setdefault("chat_summary", "")
+    state.setdefault("chat_archive", [])
+    state.setdefault("chat_older_shown", 0)
+
+
+def compact_summary(previous, turns, max_chars=SUMMARY_CHAR_LIMIT):
+    """Extractive fallback summary: first sentence of every folded turn"""
+    lines = [previous] if previous else []
+    for msg in turns:
+        first = msg["content"].strip().split("\n")[0].split(". ")[0][:200]
+        speaker = "User asked" if msg["role"] == "user" else "Assistant answered"
+        lines.append(f"- {speaker}: {first}")
+    summary = "\n".join(lines)
+    # keep the newest part when the rolling summary outgrows its budget
+    return summary[-max_chars:]
+
+
+def add_message(state, role, content, summarize=compact_summary, fold_turns=FOLD_TURNS):
+    """Append a message and fold turns beyond the recent window into the summary.
+
+    Folding waits for `fold_turns` turns of overflow and only runs after an
+    assistant reply, so the summarizer is called once per `fold_turns` turns.
+    """
+    state["messages"].append({"role": role, "content": content})
+
+    keep = RECENT_TURNS * 2
+    if role != "assistant" or len(state["messages"]) - keep < fold_turns * 2:
+        return
+
+    overflow = state["messages"][:-keep]
+    state["messages"] = state["messages"][-keep:]
+    state["chat_summary"] = summarize(state["chat_summary"], overflow)
+    state["chat_archive"] = (state["chat_archive"] + overflow)[-ARCHIVE_LIMIT:]
+
+
+def build_history(state, token_cap=HISTORY_TOKEN_CAP):
+    """Summary + as many recent turns as fit under the token cap, oldest first"""
+    history = []
+    budget = token_cap
+
+    summary = state.get("chat_summary", "")
+    if summary:
+        summary_msg = {"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"}
+        budget -= estimate_tokens(summary_msg["content"])
+        history.append(summary_msg)
+
+    recent = []
+    for msg in reversed(state.get("messages", [])):
+        cost = estimate_tokens(msg["content"])
+        if cost > budget:
+            break
+        budget -= cost
+        recent.append(msg)
+
+    return history + recent[::-1]
+
+
+def visible_messages(state):
+    """Recent window plus however many archived messages the user asked to load"""
+    shown = state.get("chat_older_shown", 0)
+    older = state.get("chat_archive", [])[-shown:] if shown else []
+    return older + state.get("messages", [])
+
+
+def has_older(state):
+    return state.get("chat_older_shown", 0) < len(state.get("chat_archive", []))
+
+
+def show_older(state, page_size=OLDER_PAGE_SIZE):
+    state["chat_older_shown"] = min(
+        state.get("chat_older_shown", 0) + page_size,
+        len(state.get("chat_archive", []))
+    )
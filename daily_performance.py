@@ -0,0 +1,98 @@
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+DAILY_FILE = "data/performance.csv"
+ROLLUP_DIR = "data/rollups"
+GRAINS = {"day": None, "week": "W", "month": "M"}  # pandas period aliases
+MEASURES = ["Revenue", "Target"]
+
+
+def load_daily_performance(filepath=DAILY_FILE):
+    """Parse the raw daily CSV once with typed dates and categorical dimensions"""
+    df = pd.read_csv(
+        filepath,
+        dtype={"Reg": "category", "Segmen Produk": "category",
+               "Revenue": "float64", "Target": "float64"},
+    )
+    df["date"] = pd.to_datetime(df.pop("Day of Date"), format="%m/%d/%Y")
+    return df
+
+
+def _source_version(filepath):
+    stat = os.stat(filepath)
+    return {"source": filepath, "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def build_rollups(filepath=DAILY_FILE, out_dir=ROLLUP_DIR):
+    """Pre-aggregate day/week/month x Reg x Segmen and store them as Parquet"""
+    df = load_daily_performance(filepath)
+    os.makedirs(out_dir, exist_ok=True)
+
+    rollups = {}
+    for grain, freq in GRAINS.items():
+        period = df["date"] if freq is None else df["date"].dt.to_period(freq).dt.start_time
+        rollup = (
+            df.assign(date=period)
+            .groupby(["date", "Reg", "Segmen Produk"], observed=True)[MEASURES]
+            .sum()
+            .reset_index()
+            .sort_values("date", kind="stable")
+            .reset_index(drop=True)
+        )
+        rollup.to_parquet(os.path.join(out_dir, f"{grain}.parquet"), index=False)
+        rollups[grain] = rollup
+
+    with open(os.path.join(out_dir, "version.json"), "w") as f:
+        json.dump(_source_version(filepath), f)
+    return rollups
+
+
+def load_rollups(filepath=DAILY_FILE, out_dir=ROLLUP_DIR):
+    """Load the Parquet rollups, rebuilding them only when the source CSV changed"""
+    version_file = os.path.join(out_dir, "version.json")
+    if os.path.exists(version_file):
+        with open(version_file) as f:
+            stored = json.load(f)
+        if stored == _source_version(filepath):
+            return {
+                grain: pd.read_parquet(os.path.join(out_dir, f"{grain}.parquet"))
+                for grain in GRAINS
+            }
+    return build_rollups(filepath, out_dir)
+
+
+def query_rollup(rollups, grain, start, end, regions=None, segments=None):
+    """Slice a rollup by date range (binary search on the sorted dates) and dimensions"""
+    rollup = rollups[grain]
+    if GRAINS[grain] is not None:
+        # include the bucket that contains the start date
+        start = pd.Timestamp(start).to_period(GRAINS[grain]).start_time
+    dates = rollup["date"].values
+    lo = np.searchsorted(dates, pd.Timestamp(start).to_datetime64(), side="left")
+    hi = np.searchsorted(dates, pd.Timestamp(end).to_datetime64(), side="right")
+    window = rollup.iloc[lo:hi]
+
+    mask = np.ones(len(window), dtype=bool)
+    if regions:
+        mask &= window["Reg"].isin(regions).values
+    if segments:
+        mask &= window["Segmen Produk"].isin(segments).values
+    return window[mask]
+
+
+def drilldown_series(window, by="Segmen Produk"):
+    """Revenue/Target per period, split by one dimension"""
+    return (
+        window.groupby(["date", by], observed=True)[MEASURES]
+        .sum()
+        .reset_index()
+    )
+
+
+if __name__ == "__main__":
+    built = build_rollups()
+    for grain, rollup in built.items():
+        print(f"{grain}: {len(rollup):,} rows")
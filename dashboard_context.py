@@ -0,0 +1,80 @@
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from facts import PERFORMANCE_FILE, facts_version
+from metrics import load_performance_data
+from tasks import load_tasks, load_subtasks
+
+# Shared by every session; loads are I/O bound (CSV reads, Postgres round trips)
+LOAD_WORKERS = 8
+_pool = ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix="dashboard-load")
+
+_shared = {}  # path -> (file version, frame)
+_shared_lock = threading.Lock()
+
+
+def shared_performance(filepath=PERFORMANCE_FILE):
+    """One performance fact table per version of its files, shared read-only by every session"""
+    version = facts_version(filepath)
+    with _shared_lock:
+        cached = _shared.get(filepath)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    df = load_performance_data(filepath)
+    with _shared_lock:
+        _shared[filepath] = (version, df)
+    return df
+
+
+SOURCES = {
+    "performance": shared_performance,
+    "tasks": load_tasks,
+    "subtasks": load_subtasks,
+}
+
+
+class DashboardContext:
+    """Independent data sources loading concurrently; each is awaited where it is used"""
+
+    def __init__(self, futures):
+        self.futures = futures
+        self.timings = {}  # source -> seconds spent loading it (filled as loads finish)
+        self.waits = {}    # source -> seconds the script blocked on it
+
+    def result(self, name):
+        started = time.perf_counter()
+        value = self.futures[name].result()
+        self.waits[name] = self.waits.get(name, 0.0) + time.perf_counter() - started
+        return value
+
+    def timing_records(self):
+        return [
+            {"source": name, "load_ms": round(self.timings[name] * 1000, 3),
+             "waited_ms": round(self.waits.get(name, 0.0) * 1000, 3)}
+            for name in self.futures if name in self.timings
+        ]
+
+
+def _timed(context, name, fn):
+    started = time.perf_counter()
+    try:
+        return fn()
+    finally:
+        context.timings[name] = time.perf_counter() - started
+
+
+def load_dashboard_context(extra_sources=None, sources=SOURCES):
+    """Submit every source to the shared pool at once, so a rerun waits max(load), not sum(load).
+
+    `extra_sources` adds app-specific loaders (e.g. the LLM client). Each task
+    runs in a copy of the caller's contextvars, so tracing spans inside the
+    loaders land in the current rerun's trace.
+    """
+    loaders = {**sources, **(extra_sources or {})}
+    context = DashboardContext({})
+    for name, fn in loaders.items():
+        run = contextvars.copy_context().run
+        context.futures[name] = _pool.submit(run, _timed, context, name, fn)
+    return context
@@ -0,0 +1,111 @@
+import os
+import time
+import threading
+
+import psycopg2
+import toml
+
+SECRETS_FILE = ".streamlit/secrets.toml"
+DB_KEYS = ["DB_HOST", "DB_NAME", "DB_USER", "DB_PASS"]
+DEFAULT_PORT = "5432"
+DEFAULT_CONNECT_TIMEOUT = "3"  # seconds; libpq otherwise waits for the OS TCP timeout
+
+BREAKER_THRESHOLD = 2     # consecutive connect failures before the circuit opens
+BREAKER_BASE_DELAY = 5.0  # first open period (s), doubled on every failed retry
+BREAKER_MAX_DELAY = 300.0
+
+
+class DatabaseUnavailable(Exception):
+    """Raised without touching the network while the circuit is open"""
+
+    def __init__(self, retry_in):
+        super().__init__(f"task database unavailable, next retry in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Closed -> open after `threshold` failures; one trial call after the backoff (half-open)"""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, base_delay=BREAKER_BASE_DELAY, max_delay=BREAKER_MAX_DELAY,
+                 clock=time.monotonic):
+        self.threshold = threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.failures = 0
+        self.opened = 0  # consecutive open periods, drives the backoff
+        self.retry_at = 0.0
+        self.trial_running = False
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.failures < self.threshold:
+                return "closed"
+            return "half-open" if self.clock() >= self.retry_at else "open"
+
+    def before_call(self):
+        with self._lock:
+            if self.failures < self.threshold:
+                return
+            now = self.clock()
+            if now < self.retry_at or self.trial_running:
+                raise DatabaseUnavailable(max(0.0, self.retry_at - now))
+            self.trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened = 0
+            self.trial_running = False
+            self.last_error = None
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.trial_running = False
+            self.last_error = error
+            if self.failures >= self.threshold:
+                delay = min(self.base_delay * 2 ** self.opened, self.max_delay)
+                self.opened += 1
+                self.retry_at = self.clock() + delay
+
+    def call(self, fn, *args, **kwargs):
+        self.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+
+db_breaker = CircuitBreaker()  # process-wide: every session shares the DB's health
+
+
+def db_settings():
+    """DB credentials from environment variables, falling back to the Streamlit secrets file"""
+    settings = {key: os.environ.get(key) for key in DB_KEYS}
+    if not all(settings.values()) and os.path.exists(SECRETS_FILE):
+        secrets = toml.load(SECRETS_FILE)
+        settings = {key: settings[key] or secrets.get(key) for key in DB_KEYS}
+    settings["DB_PORT"] = os.environ.get("DB_PORT", DEFAULT_PORT)
+    settings["DB_CONNECT_TIMEOUT"] = os.environ.get("DB_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)
+    return settings
+
+
+def connect_db():
+    """Connect through the circuit breaker; fails fast with DatabaseUnavailable while it is open"""
+    settings = db_settings()
+    return db_breaker.call(
+        psycopg2.connect,
+        host=settings["DB_HOST"],
+        port=settings["DB_PORT"],
+        database=settings["DB_NAME"],
+        user=settings["DB_USER"],
+        password=settings["DB_PASS"],
+        connect_timeout=int(settings["DB_CONNECT_TIMEOUT"]),
+    )
@@ -0,0 +1,130 @@
+import os
+import json
+import hashlib
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xlsxwriter
+
+from snapshot import cube_frame
+
+EXPORT_DIR = "data/exports"
+CHUNK_ROWS = 50_000
+MAX_CACHED_FILES = 50
+
+FORMATS = {
+    "csv": ("CSV", "text/csv"),
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "parquet": ("Parquet", "application/vnd.apache.parquet"),
+}
+
+
+def frame_fingerprint(df):
+    """Cheap content hash of a frame (vectorized row hashes), used as its data version"""
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.md5(row_hashes.tobytes() + ",".join(map(str, df.columns)).encode()).hexdigest()
+
+
+def export_key(kind, state, fmt):
+    """Cache key for an export: what is exported, under which filter state, in which format"""
+    payload = json.dumps({"kind": kind, "state": state, "fmt": fmt}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def export_path(kind, state, fmt, out_dir=EXPORT_DIR):
+    return os.path.join(out_dir, f"{kind}-{export_key(kind, state, fmt)}.{fmt}")
+
+
+def _chunks(df, chunk_rows):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _write_csv(sheets, path, chunk_rows):
+    (df,) = sheets.values()
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        df.head(0).to_csv(f, index=False)
+        for chunk in _chunks(df, chunk_rows):
+            chunk.to_csv(f, index=False, header=False)
+
+
+def _write_parquet(sheets, path, chunk_rows):
+    (df,) = sheets.values()
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in _chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def _write_xlsx(sheets, path, chunk_rows):
+    # constant_memory flushes each row to disk instead of holding the workbook in RAM, but it
+    # silently drops writes to earlier rows: cells go out row by row (pandas' to_excel writes
+    # column by column, so it cannot be used here)
+    workbook = xlsxwriter.Workbook(path, {
+        "constant_memory": True, "default_date_format": "yyyy-mm-dd", "remove_timezone": True,
+    })
+    header = workbook.add_format({"bold": True})
+    try:
+        for name, df in sheets.items():
+            worksheet = workbook.add_worksheet(name[:31])
+            worksheet.write_row(0, 0, [str(column) for column in df.columns], header)
+            row = 1
+            for chunk in _chunks(df, chunk_rows):
+                # plain Python values; missing ones (NaN, NaT, None) become empty cells
+                values = chunk.astype(object).where(chunk.notna(), None).to_numpy()
+                for record in values:
+                    worksheet.write_row(row, 0, record)
+                    row += 1
+    finally:
+        workbook.close()
+
+
+WRITERS = {"csv": _write_csv, "xlsx": _write_xlsx, "parquet": _write_parquet}
+
+
+def _evict(out_dir, keep=MAX_CACHED_FILES):
+    """Drop the least recently used exports beyond `keep` files"""
+    files = [os.path.join(out_dir, name) for name in os.listdir(out_dir) if not name.endswith(".tmp")]
+    for path in sorted(files, key=os.path.getmtime)[:max(0, len(files) - keep)]:
+        os.remove(path)
+
+
+def get_export(kind, state, fmt, build, out_dir=EXPORT_DIR, chunk_rows=CHUNK_ROWS):
+    """Path of the export file, generating it only on a cache miss.
+
+    `build()` returns {sheet name: DataFrame} and is only called on a miss;
+    CSV and Parquet take exactly one sheet.
+    """
+    path = export_path(kind, state, fmt, out_dir)
+    if os.path.exists(path):
+        os.utime(path)  # mark as recently used for eviction
+        return path
+
+    os.makedirs(out_dir, exist_ok=True)
+    tmp = path + ".tmp"
+    WRITERS[fmt](build(), tmp, chunk_rows)
+    os.replace(tmp, path)
+    _evict(out_dir)
+    return path
+
+
+def cached_export(kind, state, fmt, out_dir=EXPORT_DIR):
+    """Path of an already generated export, or None"""
+    path = export_path(kind, state, fmt, out_dir)
+    return path if os.path.exists(path) else None
+
+
+def performance_report_sheets(artifacts, cube):
+    """Multi-sheet performance report: metrics, projection, timeline, forecast, redistribution"""
+    metrics = pd.DataFrame([
+        {"scope": "excluding Penyaluran Dana", **artifacts["metrics_excl"]},
+        {"scope": "including Penyaluran Dana", **artifacts["metrics_incl"]},
+    ])
+    return {
+        "Metrics": metrics,
+        "Projection": pd.DataFrame([artifacts["projection"]]),
+        "Timeline": artifacts["timeline"],
+        "Forecast": artifacts["forecast"],
+        "Redistribution": cube_frame(cube),
+    }
@@ -0,0 +1,93 @@
+"""Long-format performance fact table: one row per (year, month, category).
+
+The monthly export (performance_all.csv) is wide, with one "Kinerja <year>"
+column per year and "Target Tahun Ini" for the latest year. It is melted into
+`actual` / `target` rows on load, so a new year is appended as rows instead of
+adding columns:
+
+    data/performance/facts_2026.csv   # year,month,category,actual,target
+
+Every facts_*.csv next to the wide file is read on top of it; a row whose key
+already exists replaces the older one (late corrections).
+"""
+import os
+import re
+import glob
+
+import numpy as np
+import pandas as pd
+
+PERFORMANCE_FILE = "data/performance/performance_all.csv"
+FACTS_PATTERN = "facts_*.csv"  # appended files, next to the wide export
+
+KEY = ["year", "month", "category"]
+MEASURES = ["actual", "target"]
+FACT_DTYPES = {"year": "int16", "month": "int8", "category": "category", "actual": "float32", "target": "float32"}
+
+ACTUAL_COLUMN = re.compile(r"Kinerja (\d{4})$")
+TARGET_COLUMN = "Target Tahun Ini"  # target of the latest year in the wide file
+
+
+def wide_to_facts(wide):
+    """Melt the wide monthly export into (year, month, category, actual, target) rows"""
+    years = {int(m.group(1)): col for col in wide.columns if (m := ACTUAL_COLUMN.match(col))}
+    latest = max(years)
+    n = len(wide)
+    target = wide[TARGET_COLUMN].to_numpy(dtype=np.float32) if TARGET_COLUMN in wide else np.full(n, np.nan)
+    return pd.DataFrame({
+        "year": np.repeat(sorted(years), n),
+        "month": np.tile(wide["bulan"].to_numpy(), len(years)),
+        "category": np.tile(wide["Categori Produk"].to_numpy(), len(years)),
+        "actual": np.concatenate([wide[years[y]].to_numpy(dtype=np.float32) for y in sorted(years)]),
+        "target": np.concatenate([
+            target if y == latest else np.full(n, np.nan, dtype=np.float32) for y in sorted(years)
+        ]),
+    })
+
+
+def fact_files(filepath=PERFORMANCE_FILE):
+    """The wide export plus every appended long-format file next to it, in load order"""
+    return [filepath] + sorted(glob.glob(os.path.join(os.path.dirname(filepath), FACTS_PATTERN)))
+
+
+def facts_version(filepath=PERFORMANCE_FILE):
+    """Changes whenever any fact file is added, removed or rewritten"""
+    return tuple((path, *_stat(path)) for path in fact_files(filepath))
+
+
+def _stat(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def to_fact_table(rows):
+    """Compact dtypes, one row per key (last wins), indexed and sorted on (year, month, category)"""
+    rows = rows.dropna(subset=KEY).astype(FACT_DTYPES)
+    rows = rows[~rows.duplicated(KEY, keep="last")]
+    return rows.set_index(KEY).sort_index()
+
+
+def load_facts(filepath=PERFORMANCE_FILE):
+    """The fact table built from the wide export and any appended facts_*.csv files"""
+    parts = [wide_to_facts(pd.read_csv(filepath))]
+    parts += [pd.read_csv(path, usecols=KEY + MEASURES) for path in fact_files(filepath)[1:]]
+    # concatenated as plain columns so the category dtype is rebuilt over all files
+    return to_fact_table(pd.concat([p.astype({"category": object}) for p in parts], ignore_index=True))
+
+
+def append_facts(facts, rows):
+    """`facts` with new (year, month, category, actual, target) rows added or replacing existing keys"""
+    combined = pd.concat([facts.reset_index().astype({"category": object}), rows[KEY + MEASURES]], ignore_index=True)
+    return to_fact_table(combined)
+
+
+def years(facts):
+    return np.unique(facts.index.get_level_values("year"))
+
+
+def levels(facts):
+    """(year, month, category) index levels as arrays, for mask-based selection"""
+    index = facts.index
+    return (index.get_level_values("year").to_numpy(),
+            index.get_level_values("month").to_numpy(),
+            index.get_level_values("category"))
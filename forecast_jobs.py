@@ -0,0 +1,138 @@
+"""Background fitting of the heavier monthly forecast engines (SARIMAX, Prophet).
+
+The Streamlit script only submits a job and polls its state; fitting runs in a
+process pool shared by every session. Jobs are keyed by (engine, categories,
+data version): a second session asking for the same forecast joins the job
+already running, and finished results are written to models/forecast_jobs/
+so they survive restarts.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from forecasting import ENGINES
+
+JOB_DIR = "models/forecast_jobs"
+JOB_WORKERS = 2
+BACKGROUND_ENGINES = {"sarimax": "SARIMAX", "prophet": "Prophet"}
+EXPECTED_SECONDS = {"sarimax": 5.0, "prophet": 15.0}  # progress estimate until a fit has been timed
+
+_pool = None
+_jobs = {}       # key -> Job (this process's submitted jobs)
+_durations = {}  # engine -> fit seconds of the last finished job
+_lock = threading.Lock()
+
+
+class Job:
+    def __init__(self, key, engine, future):
+        self.key = key
+        self.engine = engine
+        self.future = future
+        self.submitted = time.time()
+
+
+def job_key(engine, categories, data_version):
+    payload = json.dumps([engine, sorted(categories), data_version])
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def _result_path(key, job_dir=JOB_DIR):
+    return os.path.join(job_dir, f"{key}.json")
+
+
+def load_result(key, job_dir=JOB_DIR):
+    """The persisted result of a finished job, or None"""
+    path = _result_path(key, job_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def fit_forecast(engine, y, horizon, period=12):
+    """Fit one engine and forecast `horizon` steps; runs inside a worker process"""
+    fit, predict = ENGINES[engine]
+    started = time.perf_counter()
+    state = fit(np.asarray(y, dtype=float), period)
+    forecast = predict(state, horizon)
+    return {"forecast": [float(v) for v in forecast], "fit_seconds": round(time.perf_counter() - started, 2)}
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # spawn: forking the Streamlit server (threads, open sockets) is unsafe
+        _pool = ProcessPoolExecutor(max_workers=JOB_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _persist(job, meta, job_dir):
+    if job.future.cancelled() or job.future.exception() is not None:
+        return  # the failed Job stays in the registry, so it is reported instead of resubmitted until retry_job()
+    result = {**meta, **job.future.result(), "finished_at": time.time()}
+    _durations[job.engine] = result["fit_seconds"]
+    os.makedirs(job_dir, exist_ok=True)
+    path = _result_path(job.key, job_dir)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(result, f)
+    os.replace(tmp, path)
+
+
+def submit_job(engine, categories, data_version, y, horizon, period=12, job_dir=JOB_DIR):
+    """Start the job unless it is finished or already running; returns its key"""
+    global _pool
+    key = job_key(engine, categories, data_version)
+    meta = {"key": key, "engine": engine, "categories": sorted(categories), "data_version": data_version}
+    with _lock:
+        if key in _jobs or os.path.exists(_result_path(key, job_dir)):
+            return key
+        args = (fit_forecast, engine, [float(v) for v in y], int(horizon), period)
+        try:
+            future = _get_pool().submit(*args)
+        except BrokenProcessPool:
+            _pool = None  # a worker died (e.g. out of memory): start a fresh pool
+            future = _get_pool().submit(*args)
+        job = _jobs[key] = Job(key, engine, future)
+    future.add_done_callback(lambda _: _persist(job, meta, job_dir))
+    return key
+
+
+def retry_job(key):
+    """Forget a failed job so the next submit_job() starts it again; returns whether one was cleared"""
+    with _lock:
+        job = _jobs.get(key)
+        if job is None or not job.future.done() or (not job.future.cancelled() and job.future.exception() is None):
+            return False
+        del _jobs[key]
+    return True
+
+
+def job_status(key, job_dir=JOB_DIR):
+    """State of a job: done (with result), running / queued (with progress estimate), failed or missing"""
+    result = load_result(key, job_dir)
+    if result is not None:
+        return {"state": "done", "result": result}
+    job = _jobs.get(key)
+    if job is None:
+        return {"state": "missing"}
+    if job.future.done():
+        error = job.future.exception()
+        if error is None:
+            return {"state": "running", "progress": 0.99, "elapsed": time.time() - job.submitted}  # persisting
+        return {"state": "failed", "error": f"{type(error).__name__}: {error}"}
+    elapsed = time.time() - job.submitted
+    expected = _durations.get(job.engine, EXPECTED_SECONDS.get(job.engine, 10.0))
+    return {
+        "state": "running" if job.future.running() else "queued",
+        "elapsed": elapsed,
+        # fits report no progress of their own: elapsed vs the last fit time, capped below done
+        "progress": min(elapsed / expected, 0.95),
+    }
@@ -0,0 +1,129 @@
+import warnings
+
+import numpy as np
+
+
+# ==============================
+# TREND + SEASONALITY OLS (the in-app model)
+# ==============================
+def trend_season_design(t, season, period=12):
+    """Design matrix [const, t, season dummies] with the first season dropped"""
+    t = np.asarray(t, dtype=float)
+    season = np.asarray(season, dtype=int)
+    dummies = (season[:, None] == np.arange(1, period)[None, :]).astype(float)
+    return np.column_stack([np.ones_like(t), t, dummies])
+
+
+def fit_trend_seasonality(t, season, y, period=12):
+    """Least-squares coefficients of the trend + seasonal dummies model"""
+    X = trend_season_design(t, season, period)
+    coef, *_ = np.linalg.lstsq(X, np.asarray(y, dtype=float), rcond=None)
+    return coef
+
+
+def predict_trend_seasonality(coef, t, season, period=12):
+    return trend_season_design(t, season, period) @ coef
+
+
+def bootstrap_trend_seasonality(t, season, y, future_t, future_season, n_boot=2000, seed=0, period=12):
+    """Residual-bootstrap predictive sample of the trend + seasonality model, shape (horizon, n_boot).
+
+    Every resample refits the model on fitted values plus resampled residuals;
+    all refits are one least-squares solve with n_boot right-hand sides. A
+    fresh residual draw is added to each path for the noise of the new months.
+    """
+    rng = np.random.default_rng(seed)
+    X = trend_season_design(t, season, period)
+    y = np.asarray(y, dtype=float)
+    coef, *_ = np.linalg.lstsq(X, y, rcond=None)
+    fitted = X @ coef
+    n, p = X.shape
+    # residuals shrink by the fit's degrees of freedom; inflate them back (floored for tiny samples)
+    resid = (y - fitted) * np.sqrt(n / max(n - p, 1))
+    resid -= resid.mean()
+
+    y_boot = fitted[:, None] + resid[rng.integers(0, n, size=(n, n_boot))]   # (n, n_boot)
+    coef_boot, *_ = np.linalg.lstsq(X, y_boot, rcond=None)                    # (p, n_boot)
+    horizon = len(future_t)
+    noise = resid[rng.integers(0, n, size=(horizon, n_boot))]
+    return trend_season_design(future_t, future_season, period) @ coef_boot + noise
+
+
+# ==============================
+# ENGINES: fit(y, period) -> state, predict(state, horizon) -> array
+# ==============================
+def ols_fit(y, period):
+    n = len(y)
+    t = np.arange(n)
+    return {"coef": fit_trend_seasonality(t, t % period, y, period), "n": n, "period": period}
+
+
+def ols_predict(state, horizon):
+    t = np.arange(state["n"], state["n"] + horizon)
+    return predict_trend_seasonality(state["coef"], t, t % state["period"], state["period"])
+
+
+def sarimax_fit(y, period):
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model = SARIMAX(
+            np.asarray(y, dtype=float), order=(1, 0, 0), seasonal_order=(1, 0, 0, period),
+            trend="ct", enforce_stationarity=False, enforce_invertibility=False,
+        )
+        return model.fit(disp=False)
+
+
+def sarimax_predict(state, horizon):
+    return np.asarray(state.forecast(horizon))
+
+
+def _xgb_features(t, period):
+    return np.column_stack([t, t % period])
+
+
+def xgboost_fit(y, period):
+    import xgboost as xgb
+
+    n = len(y)
+    model = xgb.XGBRegressor(
+        n_estimators=300, max_depth=3, learning_rate=0.05,
+        subsample=0.8, tree_method="hist", n_jobs=1, verbosity=0,
+    )
+    model.fit(_xgb_features(np.arange(n), period), np.asarray(y, dtype=float))
+    return {"model": model, "n": n, "period": period}
+
+
+def xgboost_predict(state, horizon):
+    t = np.arange(state["n"], state["n"] + horizon)
+    return state["model"].predict(_xgb_features(t, state["period"]))
+
+
+def prophet_fit(y, period):
+    import logging
+
+    import pandas as pd
+    from prophet import Prophet
+
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    n = len(y)
+    # one step per "day", with a custom seasonality of `period` steps
+    history = pd.DataFrame({"ds": pd.date_range("2000-01-01", periods=n, freq="D"), "y": np.asarray(y, dtype=float)})
+    model = Prophet(yearly_seasonality=False, weekly_seasonality=False, daily_seasonality=False)
+    model.add_seasonality(name="cycle", period=period, fourier_order=max(1, min(5, period // 2)))
+    model.fit(history)
+    return {"model": model, "n": n}
+
+
+def prophet_predict(state, horizon):
+    future = state["model"].make_future_dataframe(periods=horizon, freq="D", include_history=False)
+    return state["model"].predict(future)["yhat"].to_numpy()
+
+
+ENGINES = {
+    "ols": (ols_fit, ols_predict),
+    "sarimax": (sarimax_fit, sarimax_predict),
+    "xgboost": (xgboost_fit, xgboost_predict),
+    "prophet": (prophet_fit, prophet_predict),
+}
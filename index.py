@@ -1,17 +1,36 @@
 import streamlit as st
 import pandas as pd
-import psycopg2
 import datetime
 import os
 import plotly.express as px
 import plotly.graph_objects as go
-from streamlit_modal import Modal
 import base64
-from datetime import date
-from metrics import load_performance_data, get_metrics
+from datetime import date, timedelta
+from facts import fact_files
+from metrics import (
+    PENYALURAN_CATS, MONTH_MAP, load_performance_data, latest_year, category_names, performance_artifacts, training_series
+)
+from dashboard_context import load_dashboard_context
+from write_queue import new_key, enqueue, queued_writes, apply_pending, discard, force, retry, start_flusher, schema_problem
+from tasks import WORKLOAD_FREQS, task_alerts, expand_units, filter_tasks, status_counts, tasks_by_unit, unit_workload
+from task_history import PERIODS, ALL_UNITS, tasks_as_of, task_states, burn_chart
+from snapshot import SNAPSHOT_DIR, LATEST_FILE, data_version, load_latest_snapshot, is_fresh
+from chat_history import (
+    init_chat_state, add_message, build_history, visible_messages,
+    has_older, show_older, compact_summary, SUMMARY_CHAR_LIMIT
+)
+from daily_performance import DAILY_FILE, load_rollups, query_rollup, drilldown_series
+from forecast_pipeline import MODEL_DIR, MANIFEST_FILE, load_forecasts
+from forecast_jobs import BACKGROUND_ENGINES, submit_job, job_status, retry_job
+from redistribution import MONTHS, CUTOFFS, redistribute, redistribution_cube, category_breakdown
+from workdays import countdown
+from task_search import TaskIndex, build_task_documents, format_task_context
+from exports import FORMATS, cached_export, get_export, frame_fingerprint, performance_report_sheets
+from llm_gateway import shared_gateway
+from tracing import (
+    begin_trace, end_trace, env_enabled, span, fragment_traced, span_records, rerun_stats, to_jsonl, prometheus_text
+)
 from sklearn.linear_model import LinearRegression
-from statsmodels.tsa.statespace.sarimax import SARIMAX
-import statsmodels.api as sm
 import numpy as np
 from groq import Groq
 from streamlit.components.v1 import html as st_html
@@ -19,19 +38,20 @@ from streamlit.components.v1 import html as st_html
 
 st.set_page_config(page_title="Team Activity Dashboard", layout="wide")
 
-# Database connection settings
-DB_HOST = st.secrets["DB_HOST"]
-DB_NAME = st.secrets["DB_NAME"]
-DB_USER = st.secrets["DB_USER"]
-DB_PASS = st.secrets["DB_PASS"]
-
-def connect_db():
-    return psycopg2.connect(
-        host=DB_HOST,
-        database=DB_NAME,
-        user=DB_USER,
-        password=DB_PASS
-    )
+# Per-rerun timing spans; opt in with ?debug=1 or DASHBOARD_TRACE=1
+trace = begin_trace(st.query_params.get("debug") == "1" or env_enabled())
+
+# Independent sources load concurrently; each tab only waits for what it uses
+groq_api_key = st.secrets.get("GROQ_API_KEY")
+# one LLM gateway per process: sessions share its rate limit and in-flight requests
+data = load_dashboard_context({
+    "llm": lambda: shared_gateway("groq", lambda: Groq(api_key=groq_api_key, max_retries=0).chat.completions.create)
+})
+
+# Task edits go through a local durable queue; one flusher per process drains it to Postgres
+start_flusher()
+# queued edits belong to the session that made them: only it sees and resolves their conflicts
+write_owner = st.session_state.setdefault("write_owner", new_key())
 
 
 
@@ -40,6 +60,39 @@ def get_base64_image(image_path):
     with open(image_path, "rb") as image_file:
         return base64.b64encode(image_file.read()).decode()
 
+# Exports are generated only when asked for and cached on disk by filter state
+@st.fragment
+def render_export(label, kind, state, build, formats=("csv", "xlsx", "parquet")):
+    col_fmt, col_btn = st.columns([1, 2])
+    fmt = col_fmt.selectbox(label, formats, format_func=lambda f: FORMATS[f][0], key=f"export_fmt_{kind}")
+    path = cached_export(kind, state, fmt)
+    if path is None and col_btn.button("⚙️ Prepare export", key=f"export_prepare_{kind}"):
+        with span("export.generate", kind=kind, fmt=fmt):
+            path = get_export(kind, state, fmt, build)
+    if path is not None:
+        with open(path, "rb") as f:
+            col_btn.download_button(
+                f"📥 Download {FORMATS[fmt][0]}", f, file_name=f"{kind}.{fmt}",
+                mime=FORMATS[fmt][1], key=f"export_download_{kind}",
+            )
+
+# Progress of a background forecast fit; polled by a timed fragment while the job runs
+@fragment_traced("forecast_job")
+def render_forecast_job(key, label):
+    job = job_status(key)
+    if job["state"] == "done":
+        st.rerun()  # full rerun: the timeline picks up the finished forecast
+    elif job["state"] == "failed":
+        st.warning(f"{label} forecast failed ({job['error']}); showing the OLS forecast.")
+        if st.button("🔁 Retry", key=f"forecast_retry_{key}"):
+            retry_job(key)
+            st.rerun()  # full rerun: submit_job starts the job again
+    elif job["state"] != "missing":
+        st.progress(job["progress"], text=(
+            f"{label} is fitting in the background ({job['state']}, {job['elapsed']:.0f}s); "
+            "showing the OLS forecast until it is ready."
+        ))
+
 # Get Base64 version of the background image
 bg_image_base64 = get_base64_image("element/pospay_bg.webp")
 
@@ -191,22 +244,9 @@ st.markdown(
 
 # --- YEARLY COUNTDOWN (TOP BANNER) ---
 today = datetime.date.today()
-end_of_year = datetime.date(today.year, 12, 31)
-
-# Total calendar days in year
-total_days_year = (end_of_year - datetime.date(today.year, 1, 1)).days + 1
-# Remaining calendar days
-days_to_eoy = (end_of_year - today).days
-# Total workdays in year
-total_workdays_year = np.busday_count(
-    datetime.date(today.year, 1, 1).strftime("%Y-%m-%d"),
-    (end_of_year + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
-)
-# Remaining workdays
-workdays_to_eoy = np.busday_count(
-    today.strftime("%Y-%m-%d"),
-    (end_of_year + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
-)
+# Calendar/work days for month and year, holiday-aware (Indonesian public holidays)
+countdown_days = countdown(today)
+workdays_to_eoy = countdown_days["workdays_to_eoy"]
 
 # Display at top
 st.markdown(f"""
@@ -220,7 +260,7 @@ st.markdown(f"""
         font-weight:bold;
         margin-bottom:20px;
     ">
-        ⏳ WORKDAYS REMAINING IN 2025: 
+        ⏳ WORKDAYS REMAINING IN {today.year}: 
         <br>
             {workdays_to_eoy} days  
         <br>
@@ -235,25 +275,20 @@ with tab1:
     # ==============================
     # LOAD DATA
     # ==============================
-    df = load_performance_data()
-
-    # --- Define Penyaluran Dana categories ---
-    penyaluran_cats = [
-        "17. PENYALURAN DANA NASIONAL",
-        "18. PENYALURAN DANA DAERAH",
-        "19. PENYALURAN DANA KORPORAT"
-    ]
-
-    df_excl = df[~df["Categori Produk"].isin(penyaluran_cats)].copy()
-    df_incl = df.copy()  # keep version with Penyaluran Dana
+    with span("wait.performance") as sp:
+        df = data.result("performance")
+        sp.set(rows=len(df))
+    performance_version = data_version()
 
+    # --- Penyaluran Dana categories are reported separately ---
+    penyaluran_cats = PENYALURAN_CATS
     # ==============================
     # FILTER BAR
     # ==============================
     st.markdown("### 🔍 Summary Filter")
 
     sorted_products = sorted(
-        df_excl["Categori Produk"].unique(),
+        category_names(df),
         key=lambda x: int(x.split(".")[0]) if x.split(".")[0].isdigit() else 999
     )
 
@@ -264,46 +299,45 @@ with tab1:
         placeholder="Select categories...",
     )
 
-    if selected_products:
-        df_excl = df_excl[df_excl["Categori Produk"].isin(selected_products)]
-        df_incl = df_incl[df_incl["Categori Produk"].isin(selected_products + penyaluran_cats)]
+    # the selection is all the tab needs here; filtered frames are built inside the cached artifacts
+    selected_categories = list(selected_products) or category_names(df)
 
     # ==============================
     # METRICS & COUNTDOWN
     # ==============================
-    metrics_excl = get_metrics(df_excl)
-    metrics_incl = get_metrics(df_incl)
-
-    today = datetime.date.today()
-    end_of_month = (
-        datetime.date(today.year, today.month + 1, 1) - datetime.timedelta(days=1)
-        if today.month < 12 else datetime.date(today.year, 12, 31)
-    )
-    end_of_year = datetime.date(today.year, 12, 31)
-
-    total_days_month = (end_of_month - datetime.date(today.year, today.month, 1)).days + 1
-    total_days_year = (end_of_year - datetime.date(today.year, 1, 1)).days + 1
-
-    days_to_eom = (end_of_month - today).days
-    days_to_eoy = (end_of_year - today).days
-
-    total_workdays_month = np.busday_count(
-        datetime.date(today.year, today.month, 1).strftime("%Y-%m-%d"),
-        (end_of_month + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
-    )
-    total_workdays_year = np.busday_count(
-        datetime.date(today.year, 1, 1).strftime("%Y-%m-%d"),
-        (end_of_year + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
-    )
-
-    workdays_to_eom = np.busday_count(
-        today.strftime("%Y-%m-%d"),
-        (end_of_month + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
-    )
-    workdays_to_eoy = np.busday_count(
-        today.strftime("%Y-%m-%d"),
-        (end_of_year + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
-    )
+    # The latest snapshot (python snapshot.py) already holds the all-categories view
+    @st.cache_data
+    def get_snapshot(pointer_mtime):
+        return load_latest_snapshot()
+
+    snapshot_pointer = os.path.join(SNAPSHOT_DIR, LATEST_FILE)
+    with span("load.snapshot"):
+        snapshot = get_snapshot(os.path.getmtime(snapshot_pointer) if os.path.exists(snapshot_pointer) else 0)
+    snapshot_fresh = is_fresh(snapshot)
+
+    @st.cache_data
+    def get_performance_artifacts(data_version, selected):
+        return performance_artifacts(load_performance_data(), list(selected))
+
+    if snapshot_fresh and set(selected_products) in (set(sorted_products), set()):
+        artifacts = snapshot
+        last_update = snapshot["as_of"]
+    else:
+        with span("performance_artifacts", categories=len(selected_products)):
+            artifacts = get_performance_artifacts(performance_version, tuple(selected_products))
+        last_update = datetime.datetime.fromtimestamp(max(os.path.getmtime(path) for path in fact_files()))
+    last_update = last_update.strftime("%d %B %Y")
+
+    metrics_excl = artifacts["metrics_excl"]
+    metrics_incl = artifacts["metrics_incl"]
+
+    days_to_eom = countdown_days["days_to_eom"]
+    total_days_month = countdown_days["total_days_month"]
+    days_to_eoy = countdown_days["days_to_eoy"]
+    total_days_year = countdown_days["total_days_year"]
+    workdays_to_eom = countdown_days["workdays_to_eom"]
+    total_workdays_month = countdown_days["total_workdays_month"]
+    total_workdays_year = countdown_days["total_workdays_year"]
 
     col1, col2 = st.columns(2)
 
@@ -319,7 +353,7 @@ with tab1:
         st.markdown(f"""
             <div class='metric-box'>
                 <h4>📅 Monthly Performance</h4>
-                <p><b>last update: 10 Oktober 2025</b></p>
+                <p><b>last update: {last_update}</b></p>
                 <p><b>Total:</b> {metrics_excl['mtd_total']:,.0f}</p>
                 <p><b>Target:</b> {metrics_excl['mtd_target']:,.0f}</p>
                 <p><b>Ach:</b> {metrics_excl['mtd_ach']:.1f}%</p>
@@ -342,7 +376,7 @@ with tab1:
         st.markdown(f"""
             <div class='metric-box'>
                 <h4>📊 FY Performance</h4>
-                <p><b>last update: 10 Oktober 2025</b></p>
+                <p><b>last update: {last_update}</b></p>
                 <p><b>Total:</b> {metrics_excl['ytd_total']:,.0f}</p>
                 <p><b>Target:</b> {metrics_excl['ytd_target']:,.0f}</p>
                 <p><b>Ach:</b> {metrics_excl['ytd_ach']:.1f}%</p>
@@ -354,167 +388,171 @@ with tab1:
         """, unsafe_allow_html=True)
 
     # ==============================
-    # TIMELINE: 2024 + 2025 Forecast
+    # TIMELINE: every year in the fact table + Forecast
     # ==============================
-    st.subheader("📊 Revenue Timeline: 2024 + 2025 (with Forecast, Stable Seasonality, without Penyaluran Dana)")
-
-    monthly_agg = df_excl.groupby("bulan").agg({
-        "Kinerja 2024": "sum",
-        "Kinerja 2025": "sum",
-        "Target Tahun Ini": "sum"
-    }).reset_index()
-
-    month_map = {
-        1:"Jan",2:"Feb",3:"Mar",4:"Apr",5:"May",6:"Jun",
-        7:"Jul",8:"Aug",9:"Sep",10:"Oct",11:"Nov",12:"Dec"
-    }
-    monthly_agg["bulan_name"] = monthly_agg["bulan"].map(month_map)
-
-    df_2024 = monthly_agg[["bulan","bulan_name","Kinerja 2024"]].copy()
-    df_2024["year"] = 2024
-    df_2024.rename(columns={"Kinerja 2024":"Kinerja"}, inplace=True)
-
-    df_2025 = monthly_agg[["bulan","bulan_name","Kinerja 2025","Target Tahun Ini"]].copy()
-    df_2025["year"] = 2025
-    df_2025.rename(columns={"Kinerja 2025":"Kinerja","Target Tahun Ini":"Target"}, inplace=True)
-
-    timeline_excl = pd.concat([df_2024, df_2025], ignore_index=True)
-    timeline_excl["t"] = (timeline_excl["year"] - 2024) * 12 + timeline_excl["bulan"]
-    timeline_excl["label"] = timeline_excl["bulan_name"] + " " + timeline_excl["year"].astype(str)
-
-    # --- Train OLS on 2024 + Jan–Aug 2025 ---
-    train = timeline_excl[(timeline_excl["year"]==2024) | ((timeline_excl["year"]==2025)&(timeline_excl["bulan"]<=8))].copy()
-    month_dummies = pd.get_dummies(train["bulan"], prefix="m", drop_first=True)
-
-    X = pd.concat([train[["t"]].astype(float), month_dummies.astype(float)], axis=1)
-    y = train["Kinerja"].astype(float)
-
-    model = sm.OLS(y, sm.add_constant(X)).fit()
-
-    future_months = np.arange(9,13)
-    future_t = ((2025-2024)*12 + future_months)
-    future_dummies = pd.get_dummies(future_months, prefix="m", drop_first=True)
-    future_dummies = future_dummies.reindex(columns=month_dummies.columns, fill_value=0).astype(float)
-
-    X_future = pd.concat([pd.DataFrame({"t":future_t}, dtype=float), future_dummies], axis=1)
-    forecast_values = model.predict(sm.add_constant(X_future))
-
-    forecast_df = pd.DataFrame({
-        "year":2025,"bulan":future_months,"bulan_name":[month_map[m] for m in future_months],
-        "t":future_t,"Forecast":forecast_values
-    })
-    forecast_df["label"] = forecast_df["bulan_name"] + " 2025"
-
-    timeline_excl = timeline_excl.merge(forecast_df[["t","Forecast"]], on="t", how="left")
+    month_map = MONTH_MAP
+    timeline_excl = artifacts["timeline"]
+    forecast_df = artifacts["forecast"]
+    fitted = timeline_excl[timeline_excl["Fit"].notna()]
+    report_year = int(timeline_excl["year"].max())
+    timeline_years = " + ".join(str(y) for y in sorted(timeline_excl["year"].unique()))
+
+    st.subheader(f"📊 Revenue Timeline: {timeline_years} (with Forecast, Stable Seasonality, without Penyaluran Dana)")
+
+    # SARIMAX / Prophet fit in the background worker pool; OLS is shown until they finish
+    engine_options = {"ols": "OLS (instant)", **BACKGROUND_ENGINES}
+    engine = st.radio(
+        "Forecast engine", list(engine_options), format_func=engine_options.get,
+        horizontal=True, key="forecast_engine"
+    )
+    engine_forecast = None
+    if engine != "ols":
+        y_train, horizon = training_series(timeline_excl)
+        job_key = submit_job(engine, selected_categories, performance_version, y_train, horizon)
+        job = job_status(job_key)
+        if job["state"] == "done":
+            engine_forecast = forecast_df[["label"]].assign(Forecast=job["result"]["forecast"])
+        else:
+            pending = job["state"] in ("queued", "running")
+            st.fragment(run_every=2 if pending else None)(render_forecast_job)(job_key, engine_options[engine])
 
     # ==============================
     # PLOT
     # ==============================
-    plot_data = timeline_excl.melt(
-        id_vars=["label"], value_vars=["Kinerja","Target","Forecast"],
-        var_name="Kategori", value_name="Nilai"
-    )
-    fig = px.bar(
-        plot_data, x="label", y="Nilai", color="Kategori",
-        barmode="group", text_auto=".2s"
-    )
-    fig.update_yaxes(title="Revenue (in Millions)", tickformat=".2s")
-    fig.update_xaxes(title="Month", tickangle=-45)
-    fig.update_layout(
-        title="Revenue Timeline: 2024 + 2025 (with Forecast, Stable Seasonality)",
-        legend_title="Kategori", bargap=0.2
-    )
-    fig.add_traces(go.Scatter(
-        x=train["label"], y=model.predict(sm.add_constant(X)),
-        mode="lines", name="Trend + Seasonality Fit",
-        line=dict(color="black", dash="dash")
-    ))
-    st.plotly_chart(fig, use_container_width=True)
+    with span("plot.revenue_timeline"):
+        plot_data = timeline_excl.melt(
+            id_vars=["label"], value_vars=["Kinerja","Target","Forecast"],
+            var_name="Kategori", value_name="Nilai"
+        )
+        fig = px.bar(
+            plot_data, x="label", y="Nilai", color="Kategori",
+            barmode="group", text_auto=".2s"
+        )
+        fig.update_yaxes(title="Revenue (in Millions)", tickformat=".2s")
+        fig.update_xaxes(title="Month", tickangle=-45)
+        fig.update_layout(
+            title=f"Revenue Timeline: {timeline_years} (with Forecast, Stable Seasonality)",
+            legend_title="Kategori", bargap=0.2
+        )
+        fig.add_traces(go.Scatter(
+            x=fitted["label"], y=fitted["Fit"],
+            mode="lines", name="Trend + Seasonality Fit",
+            line=dict(color="black", dash="dash")
+        ))
+        if "P10" in forecast_df:
+            # bootstrap prediction interval of the forecast months (snapshots older than the bands lack it)
+            fig.add_traces([
+                go.Scatter(x=forecast_df["label"], y=forecast_df["P90"], mode="lines",
+                           line=dict(width=0), showlegend=False, hoverinfo="skip"),
+                go.Scatter(x=forecast_df["label"], y=forecast_df["P10"], mode="lines",
+                           line=dict(width=0), fill="tonexty", fillcolor="rgba(99,110,250,0.2)",
+                           name="Forecast P10–P90",
+                           customdata=forecast_df[["P50", "P90"]],
+                           hovertemplate="P10 %{y:,.0f}<br>P50 %{customdata[0]:,.0f}<br>P90 %{customdata[1]:,.0f}"),
+            ])
+        if engine_forecast is not None:
+            fig.add_traces(go.Scatter(
+                x=engine_forecast["label"], y=engine_forecast["Forecast"],
+                mode="lines+markers", name=f"{engine_options[engine]} Forecast",
+                line=dict(color="darkorange", width=3)
+            ))
+        st.plotly_chart(fig, use_container_width=True)
+        if engine_forecast is not None:
+            realized = timeline_excl.loc[(timeline_excl["year"] == report_year) & timeline_excl["Forecast"].isna(), "Kinerja"].sum()
+            st.caption(
+                f"{engine_options[engine]} projected revenue ({report_year}, without Penyaluran Dana): "
+                f"{realized + engine_forecast['Forecast'].sum():,.0f}"
+            )
 
 
     # ==============================
-    # SECOND PLOT — Redistributed Target (Oct–Dec)
+    # SECOND PLOT — Redistributed Target (any cutoff month)
     # ==============================
-    st.subheader("🎯 Redistributed Target (October–December 2025)")
-
-    # --- Calculate monthly achievement until September ---
-    monthly_2025 = timeline_excl[timeline_excl["year"] == 2025].copy()
-    monthly_2025["Ach"] = monthly_2025["Kinerja"] / monthly_2025["Target"]
-
-    # --- Determine total unachieved target (Jan–Sep) ---
-    achieved_until_sep = monthly_2025.loc[monthly_2025["bulan"] <= 9, "Kinerja"].sum()
-    target_until_sep = monthly_2025.loc[monthly_2025["bulan"] <= 9, "Target"].sum()
-    excess_target = target_until_sep - achieved_until_sep  # unachieved amount
-
-    # --- Calculate month weights from original target (Oct–Dec) ---
-    future_mask = monthly_2025["bulan"] >= 10
-    month_weights = (
-        monthly_2025.loc[future_mask, "Target"] /
-        monthly_2025.loc[future_mask, "Target"].sum()
-    )
+    st.subheader("🎯 Redistributed Target")
 
-    # --- Redistribute unachieved target proportionally to Oct–Dec ---
-    monthly_2025.loc[future_mask, "Target_Redistributed"] = (
-        monthly_2025.loc[future_mask, "Target"] +
-        month_weights.values * excess_target
-    )
+    # Redistribution for every category and every cutoff, computed once per data version
+    @st.cache_data
+    def get_redistribution_cube(data_version):
+        return redistribution_cube(load_performance_data())
 
-    # --- Fill earlier months with original target ---
-    monthly_2025["Target_Redistributed"] = monthly_2025["Target_Redistributed"].fillna(monthly_2025["Target"])
+    with span("redistribution_cube"):
+        cube = snapshot["cube"] if snapshot_fresh else get_redistribution_cube(performance_version)
 
-    # --- Prepare data for plotting (Oct–Dec only) ---
-    oct_dec = monthly_2025[monthly_2025["bulan"] >= 10].copy()
-
-    # Calculate per-month increase and month weight (as %)
-    oct_dec["Increase"] = oct_dec["Target_Redistributed"] - oct_dec["Target"]
-    oct_dec["Weight_pct"] = month_weights.values * 100
+    cutoff = st.select_slider(
+        "Months counted as past (unachieved target is redistributed to the months after)",
+        options=[int(c) for c in CUTOFFS], value=9, format_func=lambda m: f"Jan–{month_map[m]}"
+    )
+    k = cutoff - 1
+    future = MONTHS > cutoff
+
+    # --- Totals for the selected categories (a 12-month sum, no recomputation of the cube) ---
+    selected_mask = np.isin(cube["categories"], selected_categories)
+    actual_sel = cube["actual"][selected_mask].sum(axis=0)
+    target_sel = cube["target"][selected_mask].sum(axis=0)
+    redistributed_sel, excess_sel = redistribute(actual_sel, target_sel)
+    excess_target = excess_sel[k]
+
+    future_df = pd.DataFrame({
+        "bulan": MONTHS[future],
+        "bulan_name": [month_map[m] for m in MONTHS[future]],
+        "Kinerja": actual_sel[future],
+        "Target": target_sel[future],
+        "Target_Redistributed": redistributed_sel[k][future],
+    }).merge(forecast_df[["bulan", "Forecast"]], on="bulan", how="left")
+    future_df["Increase"] = future_df["Target_Redistributed"] - future_df["Target"]
+    future_df["Weight_pct"] = future_df["Target"] / future_df["Target"].sum() * 100 if future_df["Target"].sum() > 0 else 0.0
+
+    past_label = f"Jan–{month_map[cutoff]}"
+    future_label = f"{month_map[cutoff + 1]}–Dec"
 
     # --- Create layout: 2 columns for plot and summary ---
     col_plot, col_summary = st.columns([2, 1])
 
     with col_plot:
         # Melt for consistent grouping
-        plot_octdec = oct_dec.melt(
+        plot_future = future_df.melt(
             id_vars=["bulan_name"],
             value_vars=["Kinerja", "Target_Redistributed", "Forecast"],
             var_name="Kategori", value_name="Nilai"
         )
 
         # --- Base grouped bar chart ---
-        fig2 = px.bar(
-            plot_octdec,
-            x="bulan_name",
-            y="Nilai",
-            color="Kategori",
-            barmode="group",
-            text_auto=".2s"
-        )
-
-        # --- Add text labels for each month's redistribution weight ---
-        for i, row in oct_dec.iterrows():
-            fig2.add_annotation(
-                x=row["bulan_name"],
-                y=row["Target_Redistributed"],
-                text=f"+{row['Increase']:,.0f}M<br>Weight: {row['Weight_pct']:.1f}%",
-                showarrow=False,
-                font=dict(size=12, color="green"),
-                yanchor="bottom"
+        with span("plot.redistributed_target"):
+            fig2 = px.bar(
+                plot_future,
+                x="bulan_name",
+                y="Nilai",
+                color="Kategori",
+                barmode="group",
+                text_auto=".2s"
             )
 
-        fig2.update_yaxes(title="Revenue (in Millions)", tickformat=".2s")
-        fig2.update_xaxes(title="Month", tickangle=-45)
-        fig2.update_layout(
-            title="Redistributed Target vs Performance & Forecast (Oct–Dec 2025)",
-            legend_title="Kategori",
-            bargap=0.25,
-            title_font=dict(size=18)
-        )
-        st.plotly_chart(fig2, use_container_width=True)
+            # --- Text labels for each month's redistribution weight (one trace) ---
+            fig2.add_trace(go.Scatter(
+                x=future_df["bulan_name"],
+                y=future_df["Target_Redistributed"],
+                mode="text",
+                text=("+" + future_df["Increase"].map("{:,.0f}M".format) +
+                      "<br>Weight: " + future_df["Weight_pct"].map("{:.1f}%".format)),
+                textposition="top center",
+                textfont=dict(size=12, color="green"),
+                showlegend=False
+            ))
+
+            fig2.update_yaxes(title="Revenue (in Millions)", tickformat=".2s")
+            fig2.update_xaxes(title="Month", tickangle=-45)
+            fig2.update_layout(
+                title=f"Redistributed Target vs Performance & Forecast ({future_label} {report_year})",
+                legend_title="Kategori",
+                bargap=0.25,
+                title_font=dict(size=18)
+            )
+            st.plotly_chart(fig2, use_container_width=True)
 
     with col_summary:
-        redistributed_sum = oct_dec["Target_Redistributed"].sum()
-        original_sum_octdec = oct_dec["Target"].sum()
-        increase_pct = (redistributed_sum / original_sum_octdec - 1) * 100 if original_sum_octdec > 0 else 0
+        redistributed_sum = future_df["Target_Redistributed"].sum()
+        original_sum_future = future_df["Target"].sum()
+        increase_pct = (redistributed_sum / original_sum_future - 1) * 100 if original_sum_future > 0 else 0
 
         # --- DISPLAY SUMMARY ---
         st.markdown(f"""
@@ -527,88 +565,224 @@ with tab1:
                 font-weight:bold;
                 text-align:left;
                 margin-top:20px;">
-                📆 Jan–Sep Underachievement:<br>
+                📆 {past_label} Underachievement:<br>
                 {excess_target:,.0f} M<br><br>
-                🎯 Oct–Dec Redistributed Target:<br>
+                🎯 {future_label} Redistributed Target:<br>
                 {redistributed_sum:,.0f} M<br>
                 <span style="font-size:16px;">
-                    vs Original: {original_sum_octdec:,.0f} ({increase_pct:+.1f}%)
+                    vs Original: {original_sum_future:,.0f} ({increase_pct:+.1f}%)
                 </span>
             </div>
         """, unsafe_allow_html=True)
 
+    with st.expander("Per-category breakdown"):
+        breakdown = category_breakdown(cube, cutoff, selected_categories)
+        st.dataframe(
+            breakdown.style.format("{:,.0f}", subset=["Underachievement", "Original Target", "Redistributed Target"])
+            .format("{:+.1f}", subset=["Increase (%)"], na_rep="–"),
+            use_container_width=True, hide_index=True
+        )
+
     # ==============================
     # SUMMARY (Projected)
     # ==============================
-    monthly_summary_excl = (
-        timeline_excl[timeline_excl["year"]==2025]
-        .groupby("bulan").agg({"Kinerja":"sum","Target":"sum","Forecast":"sum"}).reset_index()
-    )
-
-    real_until_aug_excl = monthly_summary_excl.loc[monthly_summary_excl["bulan"]<=8,"Kinerja"].sum()
-    forecast_sept_dec_excl = monthly_summary_excl.loc[monthly_summary_excl["bulan"]>=9,"Forecast"].sum()
-    total_proj_excl = real_until_aug_excl + forecast_sept_dec_excl
-    target_excl = monthly_summary_excl["Target"].sum()
-    ach_excl = (total_proj_excl/target_excl*100) if target_excl>0 else 0
-
-    # --- INCLUDE (manual PD adjustment) ---
-    pd_realized_until_aug = df[df["Categori Produk"].isin(penyaluran_cats)]
-    pd_realized_until_aug = pd_realized_until_aug[pd_realized_until_aug["bulan"]<=8]["Kinerja 2025"].sum()
-
-    pd_forecast_manual = 38670
-    total_proj_incl = total_proj_excl + pd_realized_until_aug + pd_forecast_manual
-    target_incl = target_excl + df[df["Categori Produk"].isin(penyaluran_cats)]["Target Tahun Ini"].sum()
-    ach_incl = (total_proj_incl/target_incl*100) if target_incl>0 else 0
-    
+    projection = artifacts["projection"]
+    total_proj_excl = projection["total_proj_excl"]
+    ach_excl = projection["ach_excl"]
+    total_proj_incl = projection["total_proj_incl"]
+    ach_incl = projection["ach_incl"]
 
     # --- DISPLAY ---
     st.markdown(f"""
         <div style="background-color:#1c2d5a;padding:15px;border-radius:10px;
         color:white;font-size:20px;font-weight:bold;text-align:center;margin-top:20px;">
-            📈 Projected Revenue (2025): <br>
+            📈 Projected Revenue ({report_year}): <br>
                 {total_proj_excl:,.0f}<br>
-            🎯 Projected Achievement (2025): <br>
+            🎯 Projected Achievement ({report_year}): <br>
                 {ach_excl:.1f}%<br><br>
-            📈 Projected Revenue (include Penyaluran Dana) (2025): <br>
+            📈 Projected Revenue (include Penyaluran Dana) ({report_year}): <br>
               {total_proj_incl:,.0f}<br>
-            🎯 Projected Achievement include Penyaluran Dana (2025): <br>
+            🎯 Projected Achievement include Penyaluran Dana ({report_year}): <br>
               {ach_incl:.1f}%
         </div>
     """, unsafe_allow_html=True)
 
+    if "ach_excl_p10" in projection:
+        st.caption("Projected achievement range (bootstrap of the forecast residuals; P50 is the median outcome)")
+        interval_cols = st.columns(2)
+        for col, scope, label in zip(interval_cols, ["excl", "incl"], ["without Penyaluran Dana", "include Penyaluran Dana"]):
+            col.markdown(f"**{label}**")
+            for quantile_col, name in zip(col.columns(3), ["p10", "p50", "p90"]):
+                quantile_col.metric(
+                    name.upper(), f"{projection[f'ach_{scope}_{name}']:.1f}%",
+                    help=f"Projected revenue: {projection[f'total_proj_{scope}_{name}']:,.0f}"
+                )
+
+    render_export(
+        "📥 Performance report", "performance_report",
+        {"data": performance_version, "categories": sorted(selected_products)},
+        lambda: performance_report_sheets(artifacts, cube),
+        formats=("xlsx",),
+    )
+
+
+    # ==============================
+    # DAILY DRILL-DOWN (data/performance.csv)
+    # ==============================
+    st.subheader("🔎 Daily Revenue Drill-down")
+
+    # Rollups are shared read-only across sessions; the source mtime keys a rebuild
+    @st.cache_resource
+    def get_daily_rollups(source_mtime):
+        return load_rollups()
+
+    with span("load.daily_rollups"):
+        rollups = get_daily_rollups(os.path.getmtime(DAILY_FILE))
+    daily_days = rollups["day"]
+    min_day = daily_days["date"].min().date()
+    max_day = daily_days["date"].max().date()
+
+    col_grain, col_reg, col_seg = st.columns([1, 2, 2])
+    with col_grain:
+        grain = st.radio("Granularity", ["day", "week", "month"], index=1, horizontal=True)
+    with col_reg:
+        regions = st.multiselect(
+            "Region", options=list(daily_days["Reg"].cat.categories),
+            placeholder="All regions"
+        )
+    with col_seg:
+        segments = st.multiselect(
+            "Segmen Produk", options=list(daily_days["Segmen Produk"].cat.categories),
+            placeholder="All segments"
+        )
+
+    start_day, end_day = st.slider(
+        "Date range", min_value=min_day, max_value=max_day,
+        value=(min_day, max_day), format="DD/MM/YYYY"
+    )
+
+    with span("drilldown.query") as sp:
+        drill_window = query_rollup(rollups, grain, start_day, end_day, regions, segments)
+        drill_series = drilldown_series(drill_window)
+        sp.set(rows=len(drill_window))
+
+    if drill_series.empty:
+        st.info("No daily data for the selected filters.")
+    else:
+        with span("plot.daily_drilldown"):
+            fig_daily = px.line(
+                drill_series, x="date", y="Revenue", color="Segmen Produk",
+                title=f"Revenue per {grain} by Segmen Produk"
+            )
+            fig_daily.update_yaxes(title="Revenue", tickformat=".2s")
+            fig_daily.update_xaxes(title="Date")
+            st.plotly_chart(fig_daily, use_container_width=True)
+
+        drill_totals = drill_window.groupby("Segmen Produk", observed=True)[["Revenue", "Target"]].sum()
+        drill_totals["Ach (%)"] = np.where(
+            drill_totals["Target"] > 0, drill_totals["Revenue"] / drill_totals["Target"] * 100, np.nan
+        )
+        st.dataframe(drill_totals.style.format("{:,.0f}", subset=["Revenue", "Target"])
+                     .format("{:.1f}", subset=["Ach (%)"]), use_container_width=True)
+
+
+    # ==============================
+    # SEGMENT FORECAST (XGBoost, trained offline by forecast_pipeline.py)
+    # ==============================
+    st.subheader("🤖 Segment Forecast (XGBoost)")
+
+    @st.cache_data
+    def get_segment_forecasts(manifest_mtime):
+        return load_forecasts()
+
+    manifest_path = os.path.join(MODEL_DIR, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        st.info("No trained segment models yet. Run `python forecast_pipeline.py` to train them.")
+    else:
+        with span("load.segment_forecasts"):
+            segment_forecasts = get_segment_forecasts(os.path.getmtime(manifest_path))
+        monthly_forecasts = (
+            segment_forecasts
+            .assign(month=segment_forecasts["date"].dt.to_period("M").dt.start_time)
+            .groupby(["segment", "month"])[["actual", "predicted"]].sum()
+            .reset_index()
+        )
+        forecast_segment = st.selectbox("Segment", sorted(monthly_forecasts["segment"].unique()))
+        segment_plot = monthly_forecasts[monthly_forecasts["segment"] == forecast_segment].melt(
+            id_vars=["month"], value_vars=["actual", "predicted"],
+            var_name="Kategori", value_name="Nilai"
+        )
+        with span("plot.segment_forecast"):
+            fig_xgb = px.bar(segment_plot, x="month", y="Nilai", color="Kategori", barmode="group")
+            fig_xgb.update_yaxes(title="Revenue", tickformat=".2s")
+            fig_xgb.update_xaxes(title="Month")
+            st.plotly_chart(fig_xgb, use_container_width=True)
+
 
 
 with tab2:
     # your task list code here
-    def load_tasks():
+    with span("wait.tasks"):
+        tasks_df, tasks_error = data.result("tasks")
+    if tasks_error:
+        as_of = tasks_df.attrs["as_of"]
+        age_hours = (datetime.datetime.now() - as_of).total_seconds() / 3600
+        if tasks_df.attrs["source"] == "snapshot":
+            st.warning(
+                f"⚠️ Task database unavailable ({tasks_error}). Showing the last good copy from "
+                f"{as_of:%d %B %Y %H:%M} ({age_hours:,.1f} hours old); edits may fail until it is back."
+            )
+        else:
+            st.warning(f"⚠️ Using fallback CSV because DB connection failed: {tasks_error}")
+
+    # Edits are only flushed once the DB has the write-queue migrations; say so instead of pending forever
+    @st.cache_data(ttl=300)
+    def get_schema_problem():
+        return schema_problem()
+
+    if not tasks_error:
         try:
-            # Try DB connection first
-            conn = connect_db()
-            query = "SELECT * FROM tasks;"
-            df = pd.read_sql(query, conn)
-            conn.close()
-            return df
-        except Exception as e:
-            st.warning(f"⚠️ Using fallback CSV because DB connection failed: {e}")
-            # Load local CSV instead
-            return pd.read_csv("task.csv")
-
-    def load_csv():
-        return pd.read_csv("task.csv")
-
-    tasks_df = load_tasks()
+            if problem := get_schema_problem():
+                st.error(f"⚠️ Task edits cannot be saved yet: {problem}. They stay queued until then.")
+        except Exception:
+            pass  # DB went away since the tasks loaded; the queue keeps the edits
+
+    # --- Queued writes: show them immediately, surface this session's conflicts and failures ---
+    if notice := st.session_state.pop("write_notice", None):
+        st.toast(notice)
+    queued = queued_writes()
+    tasks_df = apply_pending(tasks_df, queued)
+    pending_writes = [w for w in queued if w["status"] == "pending"]
+    if pending_writes:
+        st.info(f"🕓 {len(pending_writes)} task change(s) waiting to sync to the database; they are already shown below.")
+    for write in (w for w in queued if w["status"] == "conflict" and w["owner"] == write_owner):
+        with st.container(border=True):
+            st.error(
+                f"⚠️ Your edit of \"{write['payload']['task_name']}\" (queued {write['enqueued_at']}) was not applied: "
+                "someone else saved this task after you opened it."
+            )
+            col_keep, col_force = st.columns(2)
+            if col_keep.button("Discard my edit", key=f"discard_{write['idempotency_key']}"):
+                discard(write["idempotency_key"], write_owner)
+                st.rerun()
+            if col_force.button("Overwrite with my edit", key=f"force_{write['idempotency_key']}"):
+                force(write["idempotency_key"], write_owner)
+                st.rerun()
+    for write in (w for w in queued if w["status"] == "failed" and w["owner"] == write_owner):
+        with st.container(border=True):
+            st.error(
+                f"⚠️ Your edit of \"{write['payload']['task_name']}\" (queued {write['enqueued_at']}) could not be saved "
+                f"after {write['attempts']} attempts: {write['last_error']}"
+            )
+            col_keep, col_retry = st.columns(2)
+            if col_keep.button("Discard my edit", key=f"discard_{write['idempotency_key']}"):
+                discard(write["idempotency_key"], write_owner)
+                st.rerun()
+            if col_retry.button("Retry", key=f"retry_{write['idempotency_key']}"):
+                retry(write["idempotency_key"], write_owner)
+                st.rerun()
 
     # Expand multiple units
-    def expand_units(df):
-        expanded_rows = []
-        for _, row in df.iterrows():
-            units = row["assigned_unit"].split(" & ")
-            for unit in units:
-                new_row = row.copy()
-                new_row["expanded_unit"] = unit
-                expanded_rows.append(new_row)
-        return pd.DataFrame(expanded_rows)
-
     tasks_expanded_df = expand_units(tasks_df)
 
     # --- FILTER SECTION (on main page instead of sidebar) ---
@@ -620,7 +794,7 @@ with tab2:
         search_query = st.text_input("Search Task Name", "")
 
     with col2:
-        distinct_units = sorted(set(tasks_expanded_df["expanded_unit"].unique()))
+        distinct_units = sorted(tasks_expanded_df["expanded_unit"].dropna().unique())
         unit_filter = st.multiselect(
             "Filter by Assigned Unit", 
             options=distinct_units, 
@@ -637,11 +811,7 @@ with tab2:
         )
 
     # --- APPLY FILTERS ---
-    filtered_df = tasks_df[
-        (tasks_df["status"].isin(status_filter)) &
-        (tasks_df["assigned_unit"].apply(lambda x: any(unit in x for unit in unit_filter))) &
-        (tasks_df["task_name"].str.contains(search_query, case=False, na=False))
-    ]
+    filtered_df = filter_tasks(tasks_df, status_filter, unit_filter, search_query).copy()
 
     # Filter expanded df too
     filtered_expanded_df = expand_units(filtered_df)
@@ -657,11 +827,11 @@ with tab2:
     col1, col2, col3, col4 = st.columns(4)
 
     # Task status count
-    status_counts = filtered_df["status"].value_counts()
-    total_tasks = len(filtered_df)
-    completed = status_counts.get("Completed", 0)
-    in_progress = status_counts.get("In Progress", 0)
-    not_started = status_counts.get("Not Started", 0)
+    overview = status_counts(filtered_df)
+    total_tasks = overview["total"]
+    completed = overview["completed"]
+    in_progress = overview["in_progress"]
+    not_started = overview["not_started"]
 
     col1.markdown(f"<div class='metric-box'><h3>📌 Total Tasks</h3><p>{total_tasks}</p></div>", unsafe_allow_html=True)
     col2.markdown(f"<div class='metric-box'><h3>✅ Completed</h3><p>{completed}</p></div>", unsafe_allow_html=True)
@@ -673,69 +843,52 @@ with tab2:
     col1, col2 = st.columns(2)
 
     # 📊 Pie Chart - Task Distribution
-    fig_pie = px.pie(
-        names=status_counts.index,
-        values=status_counts.values,
-        title="Task Distribution by Status",
-        color_discrete_sequence=px.colors.qualitative.Safe
-    )
-    fig_pie.update_traces(textinfo="label+percent+value")
-    col1.plotly_chart(fig_pie, use_container_width=True)
+    with span("plot.task_status_pie"):
+        fig_pie = px.pie(
+            names=overview["by_status"].index,
+            values=overview["by_status"].values,
+            title="Task Distribution by Status",
+            color_discrete_sequence=px.colors.qualitative.Safe
+        )
+        fig_pie.update_traces(textinfo="label+percent+value")
+        col1.plotly_chart(fig_pie, use_container_width=True)
 
     # 📊 Bar Chart - Tasks by Assigned Unit
     if not filtered_expanded_df.empty:
-        tasks_grouped_df = (
-            filtered_expanded_df.groupby(["expanded_unit", "status"])
-            .size()
-            .reset_index(name="task_count")
-        )
-
-        fig_bar = px.bar(
-            tasks_grouped_df,
-            x="expanded_unit",
-            y="task_count",
-            color="status",
-            title="Tasks by Assigned Unit",
-            barmode="group",
-            text="task_count",
-            color_discrete_map={"Completed": "green", "In Progress": "orange", "Not Started": "red"}
-        ).update_layout(
-            xaxis_title="Divisi",
-            yaxis_title="Jumlah"
-        )
+        tasks_grouped_df = tasks_by_unit(filtered_expanded_df)
+
+        with span("plot.tasks_by_unit"):
+            fig_bar = px.bar(
+                tasks_grouped_df,
+                x="expanded_unit",
+                y="task_count",
+                color="status",
+                title="Tasks by Assigned Unit",
+                barmode="group",
+                text="task_count",
+                color_discrete_map={"Completed": "green", "In Progress": "orange", "Not Started": "red"}
+            ).update_layout(
+                xaxis_title="Divisi",
+                yaxis_title="Jumlah"
+            )
 
-        col2.plotly_chart(fig_bar, use_container_width=True)
+            col2.plotly_chart(fig_bar, use_container_width=True)
     else:
         col2.info("No tasks match the current filter.")
 
     # --- ALERT SECTION ---
     today = datetime.date.today()
-    one_week_from_now = today + datetime.timedelta(days=7)
-
-    # Count tasks close to deadline
-    close_to_deadline_df = filtered_df[
-        (pd.to_datetime(filtered_df["due_date"], dayfirst=True).dt.date >= today) &
-        (pd.to_datetime(filtered_df["due_date"], dayfirst=True).dt.date <= one_week_from_now) &
-        (filtered_df["status"].isin(["Not Started", "In Progress"]))
-    ]
-    close_to_deadline = close_to_deadline_df.shape[0]
 
-    # Count overdue tasks
-    overdue_tasks_df = filtered_df[
-        (pd.to_datetime(filtered_df["due_date"], dayfirst=True).dt.date < today) &
-        (filtered_df["status"] != "Completed")
-    ]
+    alerts = task_alerts(filtered_df, today)
+    close_to_deadline_df = alerts["close_to_deadline"]
+    overdue_tasks_df = alerts["overdue"]
+    unconfirmed_tasks_df = alerts["unconfirmed"]
+    close_to_deadline = close_to_deadline_df.shape[0]
     overdue_tasks = overdue_tasks_df.shape[0]
-
-    # Count unconfirmed tasks
-    unconfirmed_tasks_df = filtered_df[
-        (filtered_df["assigned_unit"].isna() | filtered_df["due_date"].isna()) &
-        (filtered_df["status"] != "Completed")
-    ]
     unconfirmed_tasks = unconfirmed_tasks_df.shape[0]
 
     # Generate alert message
-    close_to_deadline_tasks = "<br>".join([f"{row['task_name']} ({row['assigned_unit']}) ({row['status']}) ({row['due_date']})" for _, row in close_to_deadline_df.iterrows()])
+    close_to_deadline_tasks = "<br>".join([f"{row['task_name']} ({row['assigned_unit']}) ({row['status']}) ({row['due_date']}, {row['workdays_left']:.0f} workdays left)" for _, row in close_to_deadline_df.iterrows()])
     overdue_tasks_list = "<br>".join([f"{row['task_name']} ({row['assigned_unit']})" for _, row in overdue_tasks_df.iterrows()])
     unconfirmed_tasks_list = "<br>".join([f"{row['task_name']} ({row['assigned_unit']})" for _, row in unconfirmed_tasks_df.iterrows()])
 
@@ -767,86 +920,32 @@ with tab2:
 
     # --- TASK DETAILS ---
     # --- LOAD SUBTASKS ---
-    SUBTASK_FILE = "subtask.csv"
+    with span("wait.subtasks"):
+        subtasks_df = data.result("subtasks")
 
-    def load_subtasks():
-        if os.path.exists(SUBTASK_FILE):
-            return pd.read_csv(SUBTASK_FILE)
-        else:
-            return pd.DataFrame(columns=["id", "task_id", "sub_task", "start_date", "end_date"])
-
-    subtasks_df = load_subtasks()
-
-    # Ensure dates are in datetime format
-    subtasks_df["start_date"] = pd.to_datetime(subtasks_df["start_date"], errors="coerce",dayfirst=True)
-    subtasks_df["end_date"] = pd.to_datetime(subtasks_df["end_date"], errors="coerce",dayfirst=True)
-
-    # --- TASK DETAILS MODAL ---
-    
+    # --- TASK DETAILS DIALOG ---
+    @st.dialog("Task Details", width="large")
     def show_task_details(task):
-        st.markdown("""
-            <style>
-            /* Modal overlay - dark transparent background */
-            div[data-modal-overlay="true"] {
-                position: fixed !important;
-                top: 0 !important;
-                left: 0 !important;
-                width: 100vw !important;
-                height: 100vh !important;
-                background: rgba(0, 0, 0, 0.75) !important; /* darker dim */
-                backdrop-filter: blur(2px); /* soft blur effect */
-                z-index: 9998 !important;
-            }
+        st.write(f"**Task Name:** {task['task_name']}")
+        st.write(f"**Assigned Unit:** {task['assigned_unit']}")
+        st.write(f"**Start Date:** {task['start_date'].strftime('%d/%m/%Y')}")
+        st.write(f"**Due Date:** {task['due_date'].strftime('%d/%m/%Y') if pd.notna(task['due_date']) else 'TBC'}")
+        st.write(f"**Tindak Lanjut:** {task['follow_up']}")
 
-            /* Modal box */
-            div[data-modal-container="true"] {
-                position: fixed !important;
-                top: 50% !important;
-                left: 50% !important;
-                transform: translate(-50%, -50%) !important;
-                background: #fff !important;
-                border-radius: 12px !important;
-                padding: 20px !important;
-                width: 70vw !important;
-                max-width: 800px !important;
-                max-height: 80vh !important;
-                overflow-y: auto !important;
-                box-shadow: 0 6px 20px rgba(0,0,0,0.4) !important;
-                z-index: 9999 !important;
-            }
+        st.write("### ✅ Completed Activities")
+        st.markdown(task["completed_activities"] if task["completed_activities"] else "None", unsafe_allow_html=True)
 
-            /* Optional: style close button */
-            div[data-modal-container="true"] button {
-                background: #f44336 !important;
-                color: white !important;
-                border: none !important;
-                border-radius: 6px !important;
-                padding: 4px 10px !important;
-                cursor: pointer !important;
-            }
-            </style>
-        """, unsafe_allow_html=True)
-        modal = Modal("Task Details", key=f"modal_{task['id']}")
-        with modal.container():
-            st.write(f"**Task Name:** {task['task_name']}")
-            st.write(f"**Assigned Unit:** {task['assigned_unit']}")
-            st.write(f"**Start Date:** {task['start_date'].strftime('%d/%m/%Y')}")
-            st.write(f"**Due Date:** {task['due_date'].strftime('%d/%m/%Y') if pd.notna(task['due_date']) else 'TBC'}")
-            st.write(f"**Tindak Lanjut:** {task['follow_up']}")
-
-            st.write("### ✅ Completed Activities")
-            st.markdown(task["completed_activities"] if task["completed_activities"] else "None", unsafe_allow_html=True)
-
-            st.write("### ⏳ Pending Activities")
-            st.markdown(task["pending_activities"] if task["pending_activities"] else "None", unsafe_allow_html=True)
-
-            st.write("### 📅 Subtask Timeline")
-            task_subtasks = subtasks_df[subtasks_df["task_id"] == task["id"]]
+        st.write("### ⏳ Pending Activities")
+        st.markdown(task["pending_activities"] if task["pending_activities"] else "None", unsafe_allow_html=True)
+
+        st.write("### 📅 Subtask Timeline")
+        task_subtasks = subtasks_df[subtasks_df["task_id"] == task["id"]]
+        
+        if not task_subtasks.empty:
+            task_subtasks["start_date"] = task_subtasks["start_date"].dt.strftime('%d/%m/%Y')
+            task_subtasks["end_date"] = task_subtasks["end_date"].dt.strftime('%d/%m/%Y')
             
-            if not task_subtasks.empty:
-                task_subtasks["start_date"] = task_subtasks["start_date"].dt.strftime('%d/%m/%Y')
-                task_subtasks["end_date"] = task_subtasks["end_date"].dt.strftime('%d/%m/%Y')
-                
+            with span("plot.subtask_gantt"):
                 fig_sub_gantt = px.timeline(
                     task_subtasks,
                     x_start="start_date",
@@ -856,70 +955,111 @@ with tab2:
                     title="Subtask Timelines",
                     labels={"sub_task": "Subtask", "start_date": "Start", "end_date": "End"},
                 )
-                
+            
                 fig_sub_gantt.update_yaxes(categoryorder="total ascending")
                 fig_sub_gantt.update_layout(showlegend=False)
-                
+            
                 st.plotly_chart(fig_sub_gantt, use_container_width=True)
-            else:
-                st.write("No subtasks available for this task.")
+        else:
+            st.write("No subtasks available for this task.")
 
     def update_task_in_db(task_id, new_task_name, new_assigned_unit, new_start_date, new_due_date,
-                        new_status, new_follow_up, new_completed_activities, new_pending_activities):
-        query = """
-        UPDATE tasks 
-        SET task_name = %s,
-            assigned_unit = %s,
-            start_date = %s,
-            due_date = %s,
-            status = %s,
-            follow_up = %s,
-            completed_activities = %s,
-            pending_activities = %s,
-            last_updated = NOW()   -- ⬅️ otomatis update timestamp
-        WHERE id = %s
-        """
-        values = (
-            new_task_name, new_assigned_unit, new_start_date, new_due_date,
-            new_status, new_follow_up, new_completed_activities, new_pending_activities,
-            task_id
-        )
-
-        print("🔍 SQL Query:", query)
-        print("🔍 Values:", values)  # Debugging output
-
-        try:
-            conn = connect_db()
-            cursor = conn.cursor()
-            cursor.execute(query, values)
-            conn.commit()
-            cursor.close()
-            conn.close()
-            print("✅ Task updated successfully!")
-            return True
-        except Exception as e:
-            print("❌ Error updating task:", e)
-            return False
-
-    def execute_db_query(query, values=()):
-        conn = connect_db()  # Update with your actual DB path
-        cursor = conn.cursor()
-        cursor.execute(query, values)
-        conn.commit()
-        conn.close()    
-
-    import io
-
-    def convert_df_to_excel(df):
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-            df.to_excel(writer, index=False, sheet_name="Tasks")
-        return output.getvalue()
+                        new_status, new_follow_up, new_completed_activities, new_pending_activities,
+                        base_last_updated=None, key=None):
+        """Queue the edit; the background flusher writes it to Postgres (conflict-checked on last_updated)"""
+        with span("write_queue.enqueue", op="update", task_id=task_id):
+            enqueue("update", {
+                "task_name": new_task_name, "assigned_unit": new_assigned_unit,
+                "start_date": new_start_date, "due_date": new_due_date, "status": new_status,
+                "follow_up": new_follow_up, "completed_activities": new_completed_activities,
+                "pending_activities": new_pending_activities,
+            }, task_id=int(task_id), base_last_updated=base_last_updated, key=key, owner=write_owner)
+        return True
 
     import streamlit as st
     import pandas as pd
     from datetime import date
 
+    # Each row is its own fragment: Details / Edit / Cancel rerun just that row
+    @st.fragment
+    @fragment_traced("task_row")
+    def render_task_row(i, task):
+        col0, col1, col2, col3, col4, col5, col6, col7 = st.columns([0.4, 3, 2, 2, 1, 1, 1, 2])
+
+        # No
+        col0.markdown(f"<div class='task-cell'>{i}</div>", unsafe_allow_html=True)
+
+        # Task Name
+        col1.markdown(f"<div class='task-cell'>{task['task_name']}</div>", unsafe_allow_html=True)
+        # Assigned Unit
+        col2.markdown(f"<div class='task-cell'>{task['assigned_unit']}</div>", unsafe_allow_html=True)
+
+        # Due Date
+        due_date = pd.to_datetime(task["due_date"], dayfirst=True).strftime('%d %B %Y') if pd.notna(task["due_date"]) else "TBC"
+        col3.markdown(f"<div class='task-cell'>{due_date}</div>", unsafe_allow_html=True)
+
+        # Status (berwarna)
+        status_color = {"Completed": "green", "In Progress": "orange", "Not Started": "red"}.get(task["status"], "black")
+        col4.markdown(f"<div class='task-cell' style='color:{status_color}'>{task['status']}</div>", unsafe_allow_html=True)
+
+        # Tombol interaktif tetap Streamlit
+        details_button = col5.button("Details", key=f"details_{task['id']}")
+        if details_button:
+            show_task_details(task)
+
+        edit_button = col6.button("✏️ Edit", key=f"edit_{task['id']}")
+        if edit_button:
+            st.session_state[f"edit_mode_{task['id']}"] = True
+            st.session_state[f"write_key_{task['id']}"] = new_key()  # one key per edit, so a double submit is applied once
+
+        # Mode edit (sama seperti sebelumnya)...
+        if st.session_state.get(f"edit_mode_{task['id']}", False):
+            with st.form(f"edit_form_{task['id']}", clear_on_submit=True):
+                # form isiannya tetap sama seperti sebelumnya
+                new_task_name = st.text_input("Task Name", value=task["task_name"])
+                assigned_units = ["Fund Distribution", "Payment", "Fronting", "MCFS", "Resya",
+                                "Marketing", "DGPS", "Product Management", "not assigned"]
+
+                assigned_units_list = task["assigned_unit"].split(" & ") if task["assigned_unit"] else []
+                new_assigned_unit = st.multiselect("Assigned Unit", assigned_units, default=assigned_units_list)
+                new_assigned_unit_str = " & ".join(new_assigned_unit)
+
+                default_start_date = pd.to_datetime(task["start_date"]).date() if pd.notna(task["start_date"]) else date.today()
+                default_due_date = pd.to_datetime(task["due_date"]).date() if pd.notna(task["due_date"]) else date.today()
+                new_start_date = st.date_input("Start Date", value=default_start_date)
+                new_due_date = st.date_input("Due Date", value=default_due_date)
+
+                new_status = st.selectbox("Status", ["Not Started", "In Progress", "Completed"],
+                                        index=["Not Started", "In Progress", "Completed"].index(task["status"]))
+                new_follow_up = st.text_area("Tindak Lanjut", value=task["follow_up"])
+
+                new_completed_activities = st.text_area("✅ Completed Activities", value=task.get("completed_activities", ""))
+                new_pending_activities = st.text_area("⏳ Pending Activities", value=task.get("pending_activities", ""))
+
+                colA, colB, colC = st.columns([1, 1, 1])
+                with colA:
+                    submitted = st.form_submit_button("Save Changes")
+                with colC:
+                    cancel = st.form_submit_button("Cancel")
+
+            if submitted:
+                update_task_in_db(
+                    task["id"], new_task_name, new_assigned_unit_str, new_start_date,
+                    new_due_date, new_status, new_follow_up, new_completed_activities, new_pending_activities,
+                    base_last_updated=task.get("last_updated"),
+                    key=st.session_state.get(f"write_key_{task['id']}"),
+                )
+                st.session_state.write_notice = "✅ Task saved, syncing to the database"
+                st.session_state[f"edit_mode_{task['id']}"] = False
+                st.rerun()  # full rerun: charts and alerts depend on the saved task
+
+            if cancel:
+                st.session_state[f"edit_mode_{task['id']}"] = False
+                st.rerun(scope="fragment")
+
+        last_updated = pd.to_datetime(task["last_updated"], dayfirst=True).strftime('%d %B %Y') if pd.notna(task["last_updated"]) else "TBC"
+        col7.markdown(f"<div class='task-cell'>{last_updated}</div>", unsafe_allow_html=True)
+
     def render_task_table(filtered_df):
         # CSS untuk style border di setiap cell
         st.markdown("""
@@ -942,8 +1082,12 @@ with tab2:
         # 📥 Download + Sorting
         colA, colB, colC = st.columns([1, 1, 1])
         with colA:
-            csv_data = filtered_df.to_csv(index=False).encode("utf-8")
-            st.download_button(label="📥 Download CSV", data=csv_data, file_name="tasks.csv", mime="text/csv")
+            render_export(
+                "📥 Export tasks", "tasks",
+                {"data": frame_fingerprint(tasks_df), "status": sorted(status_filter),
+                 "units": sorted(unit_filter), "search": search_query},
+                lambda: {"Tasks": filtered_df},
+            )
 
         with colC:
             sort_option = st.selectbox("Sort by", ["Task Name", "Assigned Unit", "Due Date", "Status"], index=2)
@@ -973,78 +1117,7 @@ with tab2:
 
         # === ROWS ===
         for i, (_, task) in enumerate(filtered_df.iterrows(), start=1):
-            col0, col1, col2, col3, col4, col5, col6, col7 = st.columns([0.4, 3, 2, 2, 1, 1, 1, 2])
-
-            # No
-            col0.markdown(f"<div class='task-cell'>{i}</div>", unsafe_allow_html=True)
-
-            # Task Name
-            col1.markdown(f"<div class='task-cell'>{task['task_name']}</div>", unsafe_allow_html=True)
-            # Assigned Unit
-            col2.markdown(f"<div class='task-cell'>{task['assigned_unit']}</div>", unsafe_allow_html=True)
-
-            # Due Date
-            due_date = pd.to_datetime(task["due_date"], dayfirst=True).strftime('%d %B %Y') if pd.notna(task["due_date"]) else "TBC"
-            col3.markdown(f"<div class='task-cell'>{due_date}</div>", unsafe_allow_html=True)
-
-            # Status (berwarna)
-            status_color = {"Completed": "green", "In Progress": "orange", "Not Started": "red"}.get(task["status"], "black")
-            col4.markdown(f"<div class='task-cell' style='color:{status_color}'>{task['status']}</div>", unsafe_allow_html=True)
-
-            # Tombol interaktif tetap Streamlit
-            details_button = col5.button("Details", key=f"details_{task['id']}")
-            if details_button:
-                show_task_details(task)
-
-            edit_button = col6.button("✏️ Edit", key=f"edit_{task['id']}")
-            if edit_button:
-                st.session_state[f"edit_mode_{task['id']}"] = True
-
-            # Mode edit (sama seperti sebelumnya)...
-            if st.session_state.get(f"edit_mode_{task['id']}", False):
-                with st.form(f"edit_form_{task['id']}", clear_on_submit=True):
-                    # form isiannya tetap sama seperti sebelumnya
-                    new_task_name = st.text_input("Task Name", value=task["task_name"])
-                    assigned_units = ["Fund Distribution", "Payment", "Fronting", "MCFS", "Resya",
-                                    "Marketing", "DGPS", "Product Management", "not assigned"]
-
-                    assigned_units_list = task["assigned_unit"].split(" & ") if task["assigned_unit"] else []
-                    new_assigned_unit = st.multiselect("Assigned Unit", assigned_units, default=assigned_units_list)
-                    new_assigned_unit_str = " & ".join(new_assigned_unit)
-
-                    default_start_date = pd.to_datetime(task["start_date"]).date() if pd.notna(task["start_date"]) else date.today()
-                    default_due_date = pd.to_datetime(task["due_date"]).date() if pd.notna(task["due_date"]) else date.today()
-                    new_start_date = st.date_input("Start Date", value=default_start_date)
-                    new_due_date = st.date_input("Due Date", value=default_due_date)
-
-                    new_status = st.selectbox("Status", ["Not Started", "In Progress", "Completed"],
-                                            index=["Not Started", "In Progress", "Completed"].index(task["status"]))
-                    new_follow_up = st.text_area("Tindak Lanjut", value=task["follow_up"])
-
-                    new_completed_activities = st.text_area("✅ Completed Activities", value=task.get("completed_activities", ""))
-                    new_pending_activities = st.text_area("⏳ Pending Activities", value=task.get("pending_activities", ""))
-
-                    colA, colB, colC = st.columns([1, 1, 1])
-                    with colA:
-                        submitted = st.form_submit_button("Save Changes")
-                    with colC:
-                        cancel = st.form_submit_button("Cancel")
-
-                if submitted:
-                    update_task_in_db(
-                        task["id"], new_task_name, new_assigned_unit_str, new_start_date,
-                        new_due_date, new_status, new_follow_up, new_completed_activities, new_pending_activities
-                    )
-                    st.success("✅ Task updated successfully!")
-                    st.session_state[f"edit_mode_{task['id']}"] = False
-                    st.rerun()
-
-                if cancel:
-                    st.session_state[f"edit_mode_{task['id']}"] = False
-                    st.rerun()
-
-            last_updated = pd.to_datetime(task["last_updated"], dayfirst=True).strftime('%d %B %Y') if pd.notna(task["last_updated"]) else "TBC"
-            col7.markdown(f"<div class='task-cell'>{last_updated}</div>", unsafe_allow_html=True)
+            render_task_row(i, task)
 
 
 
@@ -1060,174 +1133,306 @@ with tab2:
     # Sort the filtered_df by due date before creating the Gantt chart
     filtered_df = filtered_df.sort_values(by=["due_date", "id"], ascending=[False, True])
 
-    fig_gantt = px.timeline(
-        filtered_df,
-        x_start="start_date",
-        x_end="due_date",
-        y="task_name",
-        color="task_name",  # Assign unique colors to each task
-        title="Task Timelines",
-        labels={"task_name": "Task", "start_date": "Start", "due_date": "Due"},
-    )
+    with span("plot.task_gantt"):
+        fig_gantt = px.timeline(
+            filtered_df,
+            x_start="start_date",
+            x_end="due_date",
+            y="task_name",
+            color="task_name",  # Assign unique colors to each task
+            title="Task Timelines",
+            labels={"task_name": "Task", "start_date": "Start", "due_date": "Due"},
+        )
+
+        # Make the Y-axis scrollable if too many tasks
+        fig_gantt.update_layout(
+            showlegend=False,
+            xaxis=dict(tickfont=dict(size=10)),
+            margin=dict(l=10, r=10, t=30, b=30),
+            yaxis=dict(side="left", automargin=True),  # Adjust left margin dynamically
+        )
+
+        fig_gantt.update_yaxes(categoryorder="total descending")  # Order tasks chronologically
+        fig_gantt.update_layout(showlegend=False)  # Hide legend since every task has a unique color
+
+        # Add a vertical line for today's date
+        today = datetime.today().strftime('%Y-%m-%d')  # Get today's date
+        fig_gantt.add_vline(x=today, line_width=2, line_dash="dash", line_color="red")  # Red dashed line
+
+        st.plotly_chart(fig_gantt, use_container_width=True)
 
-    # Make the Y-axis scrollable if too many tasks
-    fig_gantt.update_layout(
-        showlegend=False,
-        xaxis=dict(tickfont=dict(size=10)),
-        margin=dict(l=10, r=10, t=30, b=30),
-        yaxis=dict(side="left", automargin=True),  # Adjust left margin dynamically
+    # 🔥 Unit workload - active tasks per unit and period, from the task date intervals
+    st.markdown("<div class='subheader-box'>🔥 Unit Workload</div>", unsafe_allow_html=True)
+
+    # keyed by the filtered tasks' content hash; the frame itself is not hashed again
+    @st.cache_data
+    def get_unit_workload(tasks_version, freq, _tasks):
+        return unit_workload(_tasks, freq)
+
+    workload_freq = st.radio(
+        "Workload by", list(WORKLOAD_FREQS), index=1, format_func=WORKLOAD_FREQS.get,
+        horizontal=True, key="workload_freq"
     )
+    with span("unit_workload", freq=workload_freq):
+        workload = get_unit_workload(frame_fingerprint(filtered_df), workload_freq, filtered_df)
+    if workload.empty:
+        st.info("No tasks with both a start and a due date in the current filter.")
+    else:
+        fig_workload = px.imshow(
+            workload, aspect="auto", color_continuous_scale="Reds",
+            labels=dict(x="Week of" if workload_freq == "W" else "Day", y="Unit", color="Active tasks"),
+        )
+        fig_workload.add_vline(x=pd.Timestamp.today().normalize(), line_width=2, line_dash="dash", line_color="black")
+        fig_workload.update_layout(title="Active tasks per unit (filters above apply; shared tasks count for each unit)")
+        st.plotly_chart(fig_workload, use_container_width=True)
 
-    fig_gantt.update_yaxes(categoryorder="total descending")  # Order tasks chronologically
-    fig_gantt.update_layout(showlegend=False)  # Hide legend since every task has a unique color
+    # 📉 Burndown / Burnup - rebuilt from the task event log (snapshot + later events)
+    st.markdown("<div class='subheader-box'>📉 Burndown & Burnup</div>", unsafe_allow_html=True)
 
-    # Add a vertical line for today's date
-    today = datetime.today().strftime('%Y-%m-%d')  # Get today's date
-    fig_gantt.add_vline(x=today, line_width=2, line_dash="dash", line_color="red")  # Red dashed line
+    @st.cache_data(ttl=300)
+    def get_burn_chart(start, end, freq):
+        return burn_chart(task_states(start, end, freq))
 
-    st.plotly_chart(fig_gantt, use_container_width=True)
+    @st.cache_data(ttl=300)
+    def get_tasks_as_of(day):
+        return tasks_as_of(day)
 
-    import logging
+    if tasks_error:
+        st.info("Task history is read from the database; it is shown again once the connection is back.")
+    else:
+        history_today = date.today()
+        col_range, col_period, col_unit = st.columns([2, 1, 2])
+        history_range = col_range.date_input(
+            "History range", value=(history_today - timedelta(days=90), history_today),
+            max_value=history_today, key="history_range"
+        )
+        period = col_period.selectbox("Period", list(PERIODS), format_func=PERIODS.get, key="history_period")
+        history_unit = col_unit.selectbox("Unit", [ALL_UNITS, *distinct_units], key="history_unit")
+
+        if len(history_range) == 2:
+            with span("task_history.burn_chart"):
+                burn = get_burn_chart(*history_range, period)
+            burn = burn[burn["unit"] == history_unit].assign(period_end=lambda b: b["as_of"].dt.date)
+
+            fig_burn = go.Figure([
+                go.Scatter(x=burn["period_end"], y=burn["remaining"], mode="lines+markers", name="Remaining (burndown)"),
+                go.Scatter(x=burn["period_end"], y=burn["completed"], mode="lines+markers", name="Completed (burnup)"),
+                go.Scatter(x=burn["period_end"], y=burn["scope"], mode="lines", name="Scope", line=dict(dash="dot")),
+                go.Bar(x=burn["period_end"], y=burn["overdue"], name="Overdue", opacity=0.4),
+            ])
+            fig_burn.update_layout(
+                title=f"{PERIODS[period]} burndown / burnup — {history_unit}",
+                xaxis_title="Period end", yaxis_title="Tasks", legend_title="Series"
+            )
+            st.plotly_chart(fig_burn, use_container_width=True)
+
+        with st.expander("🕰️ Task list as of a past date"):
+            as_of_day = st.date_input("As of", value=history_today, max_value=history_today, key="history_as_of")
+            with span("task_history.as_of_table"):
+                past_tasks = get_tasks_as_of(as_of_day)
+            st.dataframe(
+                past_tasks[["id", "task_name", "assigned_unit", "status", "start_date", "due_date"]],
+                use_container_width=True, hide_index=True
+            )
 
-    # Configure logging
-    logging.basicConfig(level=logging.DEBUG)
-    def add_task_to_db(task_id, task_name, assigned_unit, start_date, due_date, status, follow_up, completed_activities, pending_activities):
-        query = """
-        INSERT INTO tasks (id, task_name, assigned_unit, start_date, due_date, status, follow_up, completed_activities, pending_activities)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"""
-        values = (task_id, task_name, assigned_unit, start_date, due_date, status, follow_up, completed_activities, pending_activities)
-        
-        # Debugging logs before execution
-        logging.debug(f"Executing Query: {query}")
-        logging.debug(f"Query Values: {values}")
-        
-        execute_db_query(query, values)
-
-    # Store state of the form
-    if "show_form" not in st.session_state:
-        st.session_state.show_form = False
-
-    # Toggle form visibility
-    if st.button("➕ Add Task"):
-        st.session_state.show_form = True  # Keep form visible
-
-    # Only show the form when needed
-    if st.session_state.show_form:
-        with st.form("add_task_form", clear_on_submit=True):
-            task_name = st.text_input("Task Name")
-            assigned_units = st.multiselect("Assigned Unit", ["Fund Distribution", "Payment", "Fronting", "MCFS", "Resya", "Marketing", "DGPS", "Product Management","not assigned"])
-            assigned_unit_str = " & ".join(assigned_units)  # Join selected units with '&'
-            start_date = st.date_input("Start Date", date.today())
-            due_date = st.date_input("Due Date", date.today())
-            status = st.selectbox("Status", ["Not Started", "In Progress", "Completed"])
-            follow_up = st.text_area("Tindak Lanjut")
-            completed_activities = st.text_area("✅ Completed Activities")
-            pending_activities = st.text_area("⏳ Pending Activities")
+    def add_task_to_db(task_name, assigned_unit, start_date, due_date, status, follow_up, completed_activities, pending_activities, key=None):
+        """Queue the new task; its id is assigned when the flusher inserts it"""
+        with span("write_queue.enqueue", op="insert"):
+            enqueue("insert", {
+                "task_name": task_name, "assigned_unit": assigned_unit, "start_date": start_date,
+                "due_date": due_date, "status": status, "follow_up": follow_up,
+                "completed_activities": completed_activities, "pending_activities": pending_activities,
+            }, key=key, owner=write_owner)
+
+    # Opening, filling and cancelling the form only reruns this fragment
+    @st.fragment
+    @fragment_traced("add_task")
+    def render_add_task():
+        # Store state of the form
+        if "show_form" not in st.session_state:
+            st.session_state.show_form = False
+
+        # Toggle form visibility
+        if st.button("➕ Add Task"):
+            st.session_state.show_form = True  # Keep form visible
+            st.session_state.add_task_key = new_key()
+
+        # Only show the form when needed
+        if st.session_state.show_form:
+            with st.form("add_task_form", clear_on_submit=True):
+                task_name = st.text_input("Task Name")
+                assigned_units = st.multiselect("Assigned Unit", ["Fund Distribution", "Payment", "Fronting", "MCFS", "Resya", "Marketing", "DGPS", "Product Management","not assigned"])
+                assigned_unit_str = " & ".join(assigned_units)  # Join selected units with '&'
+                start_date = st.date_input("Start Date", date.today())
+                due_date = st.date_input("Due Date", date.today())
+                status = st.selectbox("Status", ["Not Started", "In Progress", "Completed"])
+                follow_up = st.text_area("Tindak Lanjut")
+                completed_activities = st.text_area("✅ Completed Activities")
+                pending_activities = st.text_area("⏳ Pending Activities")
             
-            colA, colB, colC = st.columns([1, 1, 1])
-            with colA:
-                submitted = st.form_submit_button("Add Task")
-            with colC:
-                cancel = st.form_submit_button("Cancel")
+                colA, colB, colC = st.columns([1, 1, 1])
+                with colA:
+                    submitted = st.form_submit_button("Add Task")
+                with colC:
+                    cancel = st.form_submit_button("Cancel")
             
-        if submitted:
-            if not task_name.strip():
-                st.error("⚠ Task Name is required!")
-            elif not assigned_units:
-                st.error("⚠ Assigned Unit is required!")
-            else:
-                new_task_id = int(tasks_df["id"].max() + 1) if not tasks_df.empty else 1
-
-                new_task = pd.DataFrame([{
-                    "id": new_task_id,
-                    "task_name": task_name,
-                    "assigned_unit": assigned_unit_str,
-                    "start_date": start_date,
-                    "due_date": due_date,
-                    "status": status,
-                    "follow_up": follow_up,
-                    "completed_activities": completed_activities,
-                    "pending_activities": pending_activities
-                }])
-
-                # Update database
-                add_task_to_db(new_task_id, task_name, assigned_unit_str, start_date, due_date, status, follow_up, completed_activities, pending_activities)
-                st.success("✅ Task added successfully!")
-                st.session_state.show_form = False
-                st.rerun()
+            if submitted:
+                if not task_name.strip():
+                    st.error("⚠ Task Name is required!")
+                elif not assigned_units:
+                    st.error("⚠ Assigned Unit is required!")
+                else:
+                    add_task_to_db(task_name, assigned_unit_str, start_date, due_date, status, follow_up,
+                                   completed_activities, pending_activities, key=st.session_state.get("add_task_key"))
+                    st.session_state.write_notice = "✅ Task added, syncing to the database"
+                    st.session_state.show_form = False
+                    st.rerun()  # full rerun so the new task shows up everywhere
             
-            if cancel:
-                st.session_state.show_form = False
-                st.rerun()
+                if cancel:
+                    st.session_state.show_form = False
+                    st.rerun(scope="fragment")
+
+    render_add_task()
 
 with tab3:
 
-    # Initialize Groq client
-    client = Groq(api_key=st.secrets["GROQ_API_KEY"])
+    # Groq calls go through the shared gateway (single-flight, rate limit, retries)
+    llm = data.result("llm")
 
     st.header("🤖 AI Assistant – Performance & Tasks")
 
     # --- Load latest context ---
-    perf_data = pd.read_csv("data/performance/performance_all.csv")   # your helper to summarize by segment
-
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-
-    # Display chat history
-    for msg in st.session_state.messages:
-        with st.chat_message(msg["role"]):
-            st.markdown(msg["content"])
-
-    # Input box
-    if prompt := st.chat_input("Ask about performance . . . "):
-        # Show user message
-        st.session_state.messages.append({"role": "user", "content": prompt})
-        with st.chat_message("user"):
-            st.markdown(prompt)
-        context = f"""
-        Full performance data (CSV format):
-        {perf_data}
-
-        Column definitions:
-        - 'bulan' → month number
-        - 'Categori Produk' → product category
-        - 'Kinerja 2024' → 2024 revenue
-        - 'Kinerja 2025' → 2025 revenue
-        - 'Target Tahun Ini' → 2025 target
-        - 'growth' → growth vs 2024
-        - 'achievement' → achievement vs target
-        """
-
-        # --- Call Groq LLM ---
-        response = client.chat.completions.create(
-            model="groq/compound",  # fast + cheap, adjust if needed
-            messages=[
-                {
-                    "role": "system",
-                    "content": """
-                    You are an AI assistant for financial and operational reporting at PT Pos Indonesia.
-                    You analyze performance data and task lists.
-                    - Interpret 'bulan' as month.
-                    - Interpret 'Categori Produk' as product name or type.
-                    - 'Kinerja 2024' and 'Kinerja 2025' are revenue performance by year.
-                    - 'Target Tahun Ini' is the current-year revenue target.
-                    - 'growth' shows revenue growth.
-                    - 'achievement' shows target achievement.
-                    Provide clear insights, note trends, highlight risks/opportunities,
-                    and give recommendations where useful.
-                    Be concise and professional.
-                    """
-                },
-                {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {prompt}"}
-            ]
-        )
+    perf_data = data.result("performance")
 
-        answer = response.choices[0].message.content
+    # Shared BM25 index over tasks + subtasks, re-indexed only where tasks changed
+    @st.cache_resource
+    def get_task_index():
+        return TaskIndex()
 
-        # Show assistant message
-        st.session_state.messages.append({"role": "assistant", "content": answer})
-        with st.chat_message("assistant"):
-            st.markdown(answer)
+    task_index = get_task_index()
+    with span("task_index.sync") as sp:
+        sp.set(reindexed=task_index.sync(build_task_documents(tasks_df, subtasks_df)))
 
+    init_chat_state(st.session_state)
 
+    def summarize_turns(previous, turns):
+        """Fold older turns into the rolling summary, falling back to an extractive one"""
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in turns)
+        try:
+            with span("llm.summarize", turns=len(turns)):
+                response = llm.complete(
+                    model="groq/compound",
+                    messages=[
+                        {"role": "system", "content": "Summarize this conversation in at most 8 short bullet points. Keep numbers, categories and task names."},
+                        {"role": "user", "content": f"Previous summary:\n{previous}\n\nNew turns:\n{transcript}"}
+                    ]
+                )
+            return response.choices[0].message.content[-SUMMARY_CHAR_LIMIT:]
+        except Exception:
+            return compact_summary(previous, turns)
+
+    # The chat is a fragment: sending a message or paging history skips the rest of the app
+    @st.fragment
+    @fragment_traced("chat")
+    def render_chat():
+        # Display chat history (recent window only, older messages on demand)
+        if has_older(st.session_state):
+            if st.button("⬆️ Load older messages"):
+                show_older(st.session_state)
+                st.rerun(scope="fragment")
+
+        for msg in visible_messages(st.session_state):
+            with st.chat_message(msg["role"]):
+                st.markdown(msg["content"])
+
+        # Input box
+        if prompt := st.chat_input("Ask about performance . . . "):
+            # Prior turns (summary + recent window) go to the model with the new question
+            history = build_history(st.session_state)
+
+            # Show user message
+            add_message(st.session_state, "user", prompt, summarize_turns)
+            with st.chat_message("user"):
+                st.markdown(prompt)
+
+            # Only the tasks relevant to the question go into the prompt
+            task_hits = task_index.search(prompt, top_k=5)
+            task_context = format_task_context(tasks_df, task_hits)
+
+            context = f"""
+            Full performance data (CSV format):
+            {perf_data}
+
+            Related tasks (top matches from the task list):
+            {task_context}
+
+            Column definitions:
+            - 'year', 'month', 'category' → one row per year, month number and product category
+            - 'actual' → revenue
+            - 'target' → revenue target (set for {latest_year(perf_data)}; empty for years without one)
+            - Tasks: name, assigned unit, status, dates and activity notes
+            """
+
+            # --- Call Groq LLM ---
+            with span("llm.chat", context_chars=len(context)):
+                response = llm.complete(
+                    model="groq/compound",  # fast + cheap, adjust if needed
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": """
+                            You are an AI assistant for financial and operational reporting at PT Pos Indonesia.
+                            You analyze performance data and task lists.
+                            - Each performance row is one (year, month, category).
+                            - Interpret 'category' as product name or type.
+                            - 'actual' is revenue performance; compare years for growth.
+                            - 'target' is the revenue target; actual / target is achievement.
+                            Provide clear insights, note trends, highlight risks/opportunities,
+                            and give recommendations where useful.
+                            Be concise and professional.
+                            """
+                        },
+                        *history,
+                        {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {prompt}"}
+                    ]
+                )
+
+            answer = response.choices[0].message.content
+
+            # Show assistant message
+            add_message(st.session_state, "assistant", answer, summarize_turns)
+            with st.chat_message("assistant"):
+                st.markdown(answer)
 
+    render_chat()
+
+
+# ==============================
+# DEBUG PERFORMANCE PANEL
+# ==============================
+end_trace(trace)
+if trace is not None:
+    with st.expander(f"🛠️ Performance trace · rerun {trace.rerun_id} · {trace.duration * 1000:,.0f} ms", expanded=False):
+        span_df = pd.DataFrame(span_records(trace))
+        if span_df.empty:
+            st.write("No spans recorded in this rerun.")
+        else:
+            span_df["span"] = span_df["depth"].map(lambda d: "  " * d) + span_df["name"]
+            totals = span_df.groupby("name", as_index=False)["duration_ms"].sum().sort_values("duration_ms")
+            st.plotly_chart(
+                px.bar(totals, x="duration_ms", y="name", orientation="h", title="Time per span (ms)"),
+                use_container_width=True,
+            )
+            st.dataframe(span_df.drop(columns=["name"]).set_index("span"), use_container_width=True)
+            st.caption("Data sources (loaded concurrently; waited = time the script blocked on each)")
+            st.dataframe(pd.DataFrame(data.timing_records()), hide_index=True, use_container_width=True)
+            st.caption("Rerun latency by scope (full app vs fragment-only reruns, this process)")
+            st.dataframe(pd.DataFrame(rerun_stats()), hide_index=True, use_container_width=True)
+            st.caption("LLM gateway (process-wide: coalesced = answered by an identical in-flight request)")
+            st.dataframe(pd.DataFrame([data.result("llm").stats()]), hide_index=True, use_container_width=True)
+            c1, c2 = st.columns(2)
+            c1.download_button("⬇️ Spans (JSON lines)", to_jsonl(trace), file_name=f"trace-{trace.rerun_id}.jsonl")
+            c2.download_button(
+                "⬇️ Totals (Prometheus)", prometheus_text() + data.result("llm").prometheus_text("groq"),
+                file_name="dashboard_spans.prom"
+            )
@@ -0,0 +1,219 @@
+"""Process-wide gateway in front of the LLM provider, shared by every session.
+
+- single-flight: identical requests in flight at the same time (same model,
+  same messages after whitespace normalization) share one upstream call;
+- a token bucket caps the upstream request rate, callers queue for a token;
+- rate-limit / server / connection errors are retried with full-jitter
+  exponential backoff, honouring Retry-After when the provider sends it;
+- counters, queue depth and latency quantiles for the debug panel / Prometheus.
+
+`complete(**request)` takes the same arguments as
+`client.chat.completions.create`, so it is a drop-in at the call sites.
+"""
+import json
+import time
+import random
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+from tracing import span
+
+RATE_PER_MINUTE = 30   # Groq free tier: 30 requests per minute
+BURST = 5
+MAX_RETRIES = 4
+BASE_DELAY = 0.5       # seconds; attempt n waits up to BASE_DELAY * 2**n
+MAX_DELAY = 8.0
+LATENCY_WINDOW = 500   # latencies kept for the quantiles
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+_gateways = {}
+_gateways_lock = threading.Lock()
+
+
+class TokenBucket:
+    """`rate` tokens per second up to `capacity`; acquire() blocks until one is free"""
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.clock = clock
+        self.updated = clock()
+        self.waiting = 0
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Take one token; returns the seconds spent waiting for it"""
+        started = self.clock()
+        with self._lock:
+            self.waiting += 1
+        try:
+            while True:
+                with self._lock:
+                    self._refill()
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return self.clock() - started
+                    wait = (1 - self.tokens) / self.rate
+                time.sleep(wait)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+
+def _status_code(error):
+    code = getattr(error, "status_code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    return code
+
+
+def is_retryable(error):
+    """Rate limits, server errors, timeouts and dropped connections are worth another try"""
+    if _status_code(error) in RETRY_STATUS:
+        return True
+    name = type(error).__name__
+    return isinstance(error, (ConnectionError, TimeoutError)) or "Connection" in name or "Timeout" in name
+
+
+def _retry_after(error):
+    headers = getattr(getattr(error, "response", None), "headers", None) or getattr(error, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def request_key(request):
+    """Identity of a request for single-flight: whitespace differences do not count"""
+    normalized = dict(request)
+    normalized["messages"] = [
+        {**message, "content": " ".join(str(message.get("content", "")).split())}
+        for message in request.get("messages", [])
+    ]
+    return hashlib.sha1(json.dumps(normalized, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000 if values else 0.0
+
+
+class LLMGateway:
+    def __init__(self, create, rate_per_minute=RATE_PER_MINUTE, burst=BURST,
+                 max_retries=MAX_RETRIES, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+        self.create = create
+        self.bucket = TokenBucket(rate_per_minute / 60, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._inflight = {}  # request key -> Future shared by every caller of that request
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "coalesced": 0, "upstream_calls": 0, "retries": 0, "failures": 0}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)           # end-to-end, per caller
+        self.upstream_latencies = deque(maxlen=LATENCY_WINDOW)  # one upstream attempt
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def complete(self, **request):
+        """Send a chat completion request (same arguments as client.chat.completions.create)"""
+        started = time.perf_counter()
+        key = request_key(request)
+        with self._lock:
+            self.counters["requests"] += 1
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.counters["coalesced"] += 1
+        try:
+            if not leader:
+                with span("llm.gateway.coalesced"):
+                    return future.result()
+            try:
+                future.set_result(self._call(request))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+            return future.result()
+        finally:
+            with self._lock:
+                self.latencies.append(time.perf_counter() - started)
+
+    def _call(self, request):
+        for attempt in range(self.max_retries + 1):
+            with span("llm.gateway.rate_limit") as sp:
+                sp.set(waited_ms=round(self.bucket.acquire() * 1000, 3))
+            self._count("upstream_calls")
+            attempt_started = time.perf_counter()
+            try:
+                with span("llm.gateway.upstream", attempt=attempt):
+                    response = self.create(**request)
+            except Exception as e:
+                self._record_upstream(attempt_started)
+                if attempt == self.max_retries or not is_retryable(e):
+                    self._count("failures")
+                    raise
+                # full jitter: uniform in [0, base * 2**attempt], or the provider's Retry-After
+                delay = _retry_after(e) or random.uniform(0, self.base_delay * 2 ** attempt)
+                self._count("retries")
+                with span("llm.gateway.backoff", attempt=attempt, status=_status_code(e)):
+                    time.sleep(min(delay, self.max_delay))
+                continue
+            self._record_upstream(attempt_started)
+            return response
+
+    def _record_upstream(self, started):
+        with self._lock:
+            self.upstream_latencies.append(time.perf_counter() - started)
+
+    def stats(self):
+        """Counters, current queue depth / in-flight requests and p50/p95 latencies (ms)"""
+        with self._lock:
+            counters = dict(self.counters)
+            latencies, upstream = list(self.latencies), list(self.upstream_latencies)
+            in_flight = len(self._inflight)
+        return {
+            **counters,
+            "in_flight": in_flight,
+            "queue_depth": self.bucket.waiting,
+            "p50_ms": round(_percentile(latencies, 0.5), 3),
+            "p95_ms": round(_percentile(latencies, 0.95), 3),
+            "upstream_p50_ms": round(_percentile(upstream, 0.5), 3),
+            "upstream_p95_ms": round(_percentile(upstream, 0.95), 3),
+        }
+
+    def prometheus_text(self, name="default"):
+        stats = self.stats()
+        lines = []
+        for counter in self.counters:
+            lines.append(f"# TYPE llm_gateway_{counter}_total counter")
+            lines.append(f'llm_gateway_{counter}_total{{gateway="{name}"}} {stats[counter]}')
+        for gauge in ("in_flight", "queue_depth"):
+            lines.append(f"# TYPE llm_gateway_{gauge} gauge")
+            lines.append(f'llm_gateway_{gauge}{{gateway="{name}"}} {stats[gauge]}')
+        lines.append("# TYPE llm_gateway_latency_seconds summary")
+        for q, key in [("0.5", "p50_ms"), ("0.95", "p95_ms")]:
+            lines.append(f'llm_gateway_latency_seconds{{gateway="{name}",quantile="{q}"}} {stats[key] / 1000:.6f}')
+        return "\n".join(lines) + "\n"
+
+
+def shared_gateway(name, create_factory, **limits):
+    """One gateway per name in this process; `create_factory` builds the upstream call on first use"""
+    with _gateways_lock:
+        gateway = _gateways.get(name)
+        if gateway is None:
+            gateway = _gateways[name] = LLMGateway(create_factory(), **limits)
+        return gateway
@@ -1,27 +1,61 @@
 import pandas as pd
+import numpy as np
 import datetime
 
-def load_performance_data(filepath="data/performance/performance_all.csv"):
-    """Load the full performance dataset"""
-    df = pd.read_csv(filepath)
-    return df
+from facts import PERFORMANCE_FILE, load_facts, levels, years
+from forecasting import fit_trend_seasonality, predict_trend_seasonality, bootstrap_trend_seasonality
+from tracing import traced
 
-def get_metrics(df):
-    """Calculate YtD and MtD metrics from performance data"""
+PENYALURAN_CATS = [
+    "17. PENYALURAN DANA NASIONAL",
+    "18. PENYALURAN DANA DAERAH",
+    "19. PENYALURAN DANA KORPORAT"
+]
+
+MONTH_MAP = {
+    1:"Jan",2:"Feb",3:"Mar",4:"Apr",5:"May",6:"Jun",
+    7:"Jul",8:"Aug",9:"Sep",10:"Oct",11:"Nov",12:"Dec"
+}
+
+TRAIN_UNTIL_MONTH = 8      # last month of the latest year used to fit the OLS forecast
+PD_FORECAST_MANUAL = 38670  # manual Penyaluran Dana projection for Sep–Dec
+N_BOOT = 2000               # bootstrap resamples behind the prediction intervals
+QUANTILES = {"p10": 10, "p50": 50, "p90": 90}
+
+
+def load_performance_data(filepath=PERFORMANCE_FILE):
+    """The performance fact table: (year, month, category) -> actual, target"""
+    return load_facts(filepath)
+
+
+def _total(values, mask=None):
+    """Sum in float64 so float32 storage does not cost precision; missing targets count as 0"""
+    values = values.to_numpy()
+    return float(np.nansum(values if mask is None else values[mask], dtype=np.float64))
+
+
+def latest_year(facts):
+    """The year being reported on (the most recent one in the data)"""
+    return int(years(facts)[-1])
+
+@traced()
+def get_metrics(facts, year=None):
+    """Calculate YtD and MtD metrics of `year` (default: the latest year) from the fact table"""
     today = datetime.date.today()
     current_month = today.month
-    current_year = today.year
+    year = year or latest_year(facts)
+    fact_year, fact_month, _ = levels(facts)
 
     # --- FY ---
-    ytd = df
-    ytd_total = ytd["Kinerja 2025"].sum()
-    ytd_target = ytd["Target Tahun Ini"].sum()
+    in_year = fact_year == year
+    ytd_total = _total(facts["actual"], in_year)
+    ytd_target = _total(facts["target"], in_year)
     ytd_ach = ytd_total / ytd_target * 100 if ytd_target > 0 else 0
 
-    # --- MtD ---
-    mtd = df[df["bulan"] == current_month]
-    mtd_total = mtd["Kinerja 2025"].sum()
-    mtd_target = mtd["Target Tahun Ini"].sum()
+    # --- MtD (a boolean mask over the index levels, no filtered frame) ---
+    mtd = in_year & (fact_month == current_month)
+    mtd_total = _total(facts["actual"], mtd)
+    mtd_target = _total(facts["target"], mtd)
     mtd_ach = mtd_total / mtd_target * 100 if mtd_target > 0 else 0
 
     return {
@@ -32,3 +66,152 @@ def get_metrics(df):
         "mtd_target": mtd_target,
         "mtd_ach": mtd_ach,
     }
+
+
+def split_penyaluran(facts, selected_products=None):
+    """Facts without / with Penyaluran Dana, restricted to the selected categories"""
+    _, _, categories = levels(facts)
+    is_pd = categories.isin(PENYALURAN_CATS)
+    if not selected_products:
+        return facts[~is_pd], facts
+    chosen = categories.isin(selected_products)
+    return facts[chosen & ~is_pd], facts[chosen | is_pd]
+
+
+def category_names(facts):
+    """Categories present in the data, Penyaluran Dana excluded"""
+    return [c for c in levels(facts)[2].unique() if c not in PENYALURAN_CATS]
+
+
+@traced()
+def monthly_timeline(facts_excl):
+    """Monthly revenue (and target, where set) of every year in the data as one timeline"""
+    fact_year, fact_month, _ = levels(facts_excl)
+    first_year = int(fact_year.min())
+    # t numbers the months from January of the first year; bincount sums per t in float64
+    t = (fact_year.astype(np.intp) - first_year) * 12 + fact_month
+    present = np.flatnonzero(np.bincount(t))
+    actual = np.bincount(t, weights=facts_excl["actual"].to_numpy())[present]
+    target = facts_excl["target"].to_numpy()
+    has_target = np.bincount(t, weights=~np.isnan(target))[present] > 0
+    target = np.bincount(t, weights=np.nan_to_num(target))[present]
+
+    bulan = (present - 1) % 12 + 1
+    timeline = pd.DataFrame({
+        "bulan": bulan,
+        "bulan_name": [MONTH_MAP[m] for m in bulan],
+        "Kinerja": actual,
+        "year": first_year + (present - 1) // 12,
+        "Target": np.where(has_target, target, np.nan),
+        "t": present,
+    })
+    timeline["label"] = timeline["bulan_name"] + " " + timeline["year"].astype(str)
+    return timeline
+
+
+def _training_window(timeline, train_until):
+    """Training mask plus the remaining months (and their t) of the latest year"""
+    year, bulan = timeline["year"].to_numpy(), timeline["bulan"].to_numpy()
+    last_year = int(year.max())
+    train_mask = (year < last_year) | ((year == last_year) & (bulan <= train_until))
+    future_months = np.arange(train_until + 1, 13)
+    future_t = (last_year - int(year.min())) * 12 + future_months
+    return train_mask, last_year, future_months, future_t
+
+
+@traced()
+def forecast_paths(timeline, train_until=TRAIN_UNTIL_MONTH, n_boot=N_BOOT, seed=0):
+    """Bootstrap sample of the remaining months' revenue, shape (months, n_boot); fixed seed so caches agree"""
+    train_mask, _, future_months, future_t = _training_window(timeline, train_until)
+    return bootstrap_trend_seasonality(
+        timeline["t"].to_numpy()[train_mask], timeline["bulan"].to_numpy()[train_mask] - 1,
+        timeline["Kinerja"].to_numpy()[train_mask], future_t, future_months - 1, n_boot=n_boot, seed=seed,
+    )
+
+
+def training_series(timeline, train_until=TRAIN_UNTIL_MONTH):
+    """The revenue the forecast is fitted on (one contiguous monthly series) and the months left to forecast"""
+    train_mask, _, future_months, _ = _training_window(timeline, train_until)
+    return timeline["Kinerja"].to_numpy()[train_mask], len(future_months)
+
+
+@traced()
+def forecast_timeline(timeline, train_until=TRAIN_UNTIL_MONTH, paths=None):
+    """Fit trend + seasonality OLS on every earlier year plus the latest one up to `train_until`,
+    forecast the rest of the latest year (with P10/P50/P90 bands when bootstrap `paths` are given)"""
+    bulan, t = timeline["bulan"].to_numpy(), timeline["t"].to_numpy()
+    train_mask, last_year, future_months, future_t = _training_window(timeline, train_until)
+    # month dummies with January as the baseline (season index = bulan - 1)
+    coef = fit_trend_seasonality(t[train_mask], bulan[train_mask] - 1, timeline["Kinerja"].to_numpy()[train_mask])
+
+    forecast_df = pd.DataFrame({
+        "year": last_year, "bulan": future_months, "bulan_name": [MONTH_MAP[m] for m in future_months],
+        "t": future_t, "Forecast": predict_trend_seasonality(coef, future_t, future_months - 1)
+    })
+    forecast_df["label"] = forecast_df["bulan_name"] + f" {last_year}"
+    bands = []
+    if paths is not None:
+        for name, q in QUANTILES.items():
+            forecast_df[name.upper()] = np.percentile(paths, q, axis=1)
+        bands = [name.upper() for name in QUANTILES]
+
+    timeline = timeline.merge(forecast_df[["t", "Forecast", *bands]], on="t", how="left")
+    timeline["Fit"] = np.where(train_mask, predict_trend_seasonality(coef, t, bulan - 1), np.nan)
+    return timeline, forecast_df
+
+
+@traced()
+def project_year_end(timeline, facts, train_until=TRAIN_UNTIL_MONTH, pd_forecast=PD_FORECAST_MANUAL, paths=None):
+    """Realized revenue of the latest year until `train_until` plus the forecast for the remaining months.
+
+    With bootstrap `paths` the year-end total and achievement also get
+    P10/P50/P90 values (quantiles of the summed paths, not sums of quantiles).
+    """
+    last_year = timeline["year"].max()
+    in_year = (timeline["year"] == last_year).to_numpy()
+    past = (timeline["bulan"] <= train_until).to_numpy()
+    realized = np.nansum(timeline["Kinerja"].to_numpy()[in_year & past])
+    forecast = np.nansum(timeline["Forecast"].to_numpy()[in_year & ~past])
+    total_proj_excl = realized + forecast
+    target_excl = np.nansum(timeline["Target"].to_numpy()[in_year])
+
+    # --- INCLUDE (manual PD adjustment) ---
+    fact_year, fact_month, categories = levels(facts)
+    is_pd = categories.isin(PENYALURAN_CATS) & (fact_year == last_year)
+    pd_realized = _total(facts["actual"], is_pd & (fact_month <= train_until))
+    total_proj_incl = total_proj_excl + pd_realized + pd_forecast
+    target_incl = target_excl + _total(facts["target"], is_pd)
+
+    projection = {
+        "year": int(last_year),
+        "total_proj_excl": float(total_proj_excl),
+        "ach_excl": float(total_proj_excl / target_excl * 100) if target_excl > 0 else 0.0,
+        "total_proj_incl": float(total_proj_incl),
+        "ach_incl": float(total_proj_incl / target_incl * 100) if target_incl > 0 else 0.0,
+        "pd_forecast_manual": pd_forecast,
+    }
+    if paths is not None:
+        totals_excl = realized + paths.sum(axis=0)
+        scopes = {"excl": (totals_excl, target_excl),
+                  "incl": (totals_excl + pd_realized + pd_forecast, target_incl)}
+        for scope, (totals, target) in scopes.items():
+            for name, q in QUANTILES.items():
+                total = float(np.percentile(totals, q))
+                projection[f"total_proj_{scope}_{name}"] = total
+                projection[f"ach_{scope}_{name}"] = total / target * 100 if target > 0 else 0.0
+    return projection
+
+
+def performance_artifacts(facts, selected_products=None):
+    """Everything the Monthly Performance tab shows for one category selection"""
+    facts_excl, facts_incl = split_penyaluran(facts, selected_products)
+    timeline = monthly_timeline(facts_excl)
+    paths = forecast_paths(timeline)
+    timeline, forecast_df = forecast_timeline(timeline, paths=paths)
+    return {
+        "metrics_excl": get_metrics(facts_excl),
+        "metrics_incl": get_metrics(facts_incl),
+        "timeline": timeline,
+        "forecast": forecast_df,
+        "projection": project_year_end(timeline, facts, paths=paths),
+    }
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+MONTHS = np.arange(1, 13)
+CUTOFFS = np.arange(1, 12)  # last "past" month; months after it receive the shortfall
+
+
+def monthly_matrix(facts, value_col):
+    """(category x 12 months) matrix of one measure of a single-year fact slice, categories in sorted order"""
+    return (
+        facts[value_col].groupby(level=["category", "month"], observed=True).sum()
+        .unstack("month")
+        .reindex(columns=MONTHS, fill_value=0)
+        .fillna(0)
+    )
+
+
+def redistribute(actual, target):
+    """Redistributed targets for every cutoff month in one broadcast operation.
+
+    `actual` and `target` are (..., 12) arrays. Returns (redistributed, excess)
+    with shapes (..., 11, 12) and (..., 11): for cutoff k, the unachieved
+    target of months 1..k is spread over months k+1..12 proportionally to
+    their original target; months up to k keep their original target.
+    """
+    actual = np.asarray(actual, dtype=float)  # float32 inputs are promoted before accumulating
+    target = np.asarray(target, dtype=float)
+
+    past = MONTHS[None, :] <= CUTOFFS[:, None]                                # (11, 12)
+    future = ~past
+
+    excess = np.einsum("...m,km->...k", target - actual, past.astype(float))  # (..., 11)
+    future_target = target[..., None, :] * future                             # (..., 11, 12)
+    future_total = future_target.sum(axis=-1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weights = np.where(future_total > 0, future_target / future_total, 0.0)
+
+    redistributed = target[..., None, :] + weights * excess[..., None]
+    return redistributed, excess
+
+
+def redistribution_cube(facts, year=None):
+    """Per-category actual/target matrices of `year` (default: the latest) and their redistribution for every cutoff"""
+    year = year or int(facts.index.get_level_values("year").max())
+    facts = facts.xs(year, level="year")
+    actual = monthly_matrix(facts, "actual")
+    target = monthly_matrix(facts, "target").reindex(actual.index, fill_value=0)
+    redistributed, excess = redistribute(actual.to_numpy(), target.to_numpy())
+    return {
+        "categories": actual.index.to_numpy(),
+        "actual": actual.to_numpy(),
+        "target": target.to_numpy(),
+        "redistributed": redistributed,
+        "excess": excess,
+    }
+
+
+def category_breakdown(cube, cutoff, categories=None):
+    """Per-category shortfall and original vs redistributed target after `cutoff`"""
+    k = cutoff - 1
+    mask = np.ones(len(cube["categories"]), dtype=bool)
+    if categories is not None:
+        mask = np.isin(cube["categories"], categories)
+
+    future = MONTHS > cutoff
+    original = cube["target"][mask][:, future].sum(axis=1)
+    redistributed = cube["redistributed"][mask, k][:, future].sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        increase_pct = np.where(original > 0, (redistributed / original - 1) * 100, np.nan)
+
+    return pd.DataFrame({
+        "Categori Produk": cube["categories"][mask],
+        "Underachievement": cube["excess"][mask, k],
+        "Original Target": original,
+        "Redistributed Target": redistributed,
+        "Increase (%)": increase_pct,
+    })
@@ -0,0 +1,261 @@
+"""Versioned schema for the task database, plus query health checks.
+
+Run from the repo root (credentials come from db.db_settings):
+
+    python schema.py migrate   # apply pending migrations
+    python schema.py status    # applied / pending versions
+    python schema.py report    # EXPLAIN checks + slowest statements
+
+Migrations are append-only: never edit an applied entry, add a new one.
+"""
+import json
+import argparse
+
+from db import connect_db
+
+MIGRATIONS_TABLE = "schema_migrations"
+
+# (version, name, sql) — applied in order, each in its own transaction
+MIGRATIONS = [
+    (1, "create tasks", """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY,
+            task_name TEXT NOT NULL,
+            assigned_unit TEXT,
+            start_date DATE,
+            due_date DATE,
+            status TEXT,
+            follow_up TEXT,
+            completed_activities TEXT,
+            pending_activities TEXT,
+            last_updated TIMESTAMP DEFAULT NOW()
+        );
+        -- tables created before migrations existed may lack the audit column
+        ALTER TABLE tasks ADD COLUMN IF NOT EXISTS last_updated TIMESTAMP DEFAULT NOW();
+    """),
+    (2, "create subtasks", """
+        CREATE TABLE IF NOT EXISTS subtasks (
+            id INTEGER PRIMARY KEY,
+            task_id INTEGER NOT NULL REFERENCES tasks (id) ON DELETE CASCADE,
+            sub_task TEXT NOT NULL,
+            start_date DATE,
+            end_date DATE
+        );
+    """),
+    (3, "task indexes", """
+        CREATE INDEX IF NOT EXISTS tasks_status_due_date_idx ON tasks (status, due_date);
+        CREATE INDEX IF NOT EXISTS tasks_due_date_idx ON tasks (due_date);
+        CREATE INDEX IF NOT EXISTS tasks_assigned_unit_idx ON tasks (assigned_unit);
+        CREATE INDEX IF NOT EXISTS tasks_last_updated_idx ON tasks (last_updated DESC);
+        CREATE INDEX IF NOT EXISTS subtasks_task_id_idx ON subtasks (task_id);
+    """),
+    (4, "task text search", """
+        -- 'simple' config: task text is Indonesian, so no English stemming
+        CREATE INDEX IF NOT EXISTS tasks_search_idx ON tasks USING GIN (
+            to_tsvector('simple',
+                coalesce(task_name, '') || ' ' || coalesce(follow_up, '') || ' ' ||
+                coalesce(completed_activities, '') || ' ' || coalesce(pending_activities, ''))
+        );
+        CREATE INDEX IF NOT EXISTS subtasks_search_idx ON subtasks USING GIN (
+            to_tsvector('simple', coalesce(sub_task, ''))
+        );
+    """),
+    (5, "applied writes", """
+        -- idempotency keys of queued task writes already applied (see write_queue.py)
+        CREATE TABLE IF NOT EXISTS applied_writes (
+            idempotency_key TEXT PRIMARY KEY,
+            applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+        );
+        CREATE INDEX IF NOT EXISTS applied_writes_applied_at_idx ON applied_writes (applied_at);
+    """),
+    (6, "task history", """
+        -- append-only: one row per task write, holding the full row after it (see task_history.py)
+        CREATE TABLE IF NOT EXISTS task_events (
+            id BIGSERIAL PRIMARY KEY,
+            task_id INTEGER NOT NULL,        -- no FK: history outlives deleted tasks
+            op TEXT NOT NULL,                -- 'baseline' | 'insert' | 'update'
+            idempotency_key TEXT,
+            occurred_at TIMESTAMP NOT NULL,
+            state JSONB NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS task_events_occurred_at_idx ON task_events (occurred_at);
+        CREATE INDEX IF NOT EXISTS task_events_task_time_idx ON task_events (task_id, occurred_at DESC, id DESC);
+        -- periodic materialized state, so "as of" queries only replay the events after one
+        CREATE TABLE IF NOT EXISTS task_snapshots (
+            as_of TIMESTAMP NOT NULL,
+            task_id INTEGER NOT NULL,
+            state JSONB NOT NULL,
+            PRIMARY KEY (as_of, task_id)
+        );
+        -- tasks written before the log existed start from their current row
+        INSERT INTO task_events (task_id, op, occurred_at, state)
+        SELECT t.id, 'baseline', COALESCE(t.last_updated, NOW()), to_jsonb(t) FROM tasks t
+        WHERE NOT EXISTS (SELECT 1 FROM task_events e WHERE e.task_id = t.id);
+    """),
+]
+
+# Access paths the dashboard relies on; each should be servable by an index
+CHECK_QUERIES = {
+    "open tasks near deadline": (
+        "SELECT * FROM tasks WHERE status = 'In Progress' AND due_date <= CURRENT_DATE + 7"
+    ),
+    "tasks by unit": "SELECT * FROM tasks WHERE assigned_unit = 'Fund Distribution'",
+    "tasks by due date": "SELECT id, task_name, due_date FROM tasks ORDER BY due_date LIMIT 50",
+    "recently updated": "SELECT id, last_updated FROM tasks ORDER BY last_updated DESC LIMIT 20",
+    "subtasks of task": "SELECT * FROM subtasks WHERE task_id = 1",
+    "task events since": "SELECT task_id FROM task_events WHERE occurred_at > NOW() - INTERVAL '7 days'",
+    "update task": "UPDATE tasks SET status = status WHERE id = 1",
+    "task text search": (
+        "SELECT id FROM tasks WHERE to_tsvector('simple', "
+        "coalesce(task_name, '') || ' ' || coalesce(follow_up, '') || ' ' || "
+        "coalesce(completed_activities, '') || ' ' || coalesce(pending_activities, '')) "
+        "@@ plainto_tsquery('simple', 'proyek')"
+    ),
+}
+
+
+def _ensure_migrations_table(cur):
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+    """)
+
+
+def applied_versions(conn):
+    with conn.cursor() as cur:
+        _ensure_migrations_table(cur)
+        cur.execute(f"SELECT version FROM {MIGRATIONS_TABLE}")
+        versions = {row[0] for row in cur.fetchall()}
+    conn.commit()
+    return versions
+
+
+def pending_migrations(conn):
+    applied = applied_versions(conn)
+    return [m for m in MIGRATIONS if m[0] not in applied]
+
+
+def missing_migrations(conn, required):
+    """(version, name) of the migrations up to `required` that are not applied yet"""
+    applied = applied_versions(conn)
+    return [(version, name) for version, name, _ in MIGRATIONS if version <= required and version not in applied]
+
+
+def migrate(conn):
+    """Apply pending migrations in order; returns the versions applied"""
+    done = []
+    for version, name, sql in pending_migrations(conn):
+        with conn.cursor() as cur:
+            # serialize concurrent deploys: the second runner waits, then finds nothing pending
+            cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (MIGRATIONS_TABLE,))
+            cur.execute(f"SELECT 1 FROM {MIGRATIONS_TABLE} WHERE version = %s", (version,))
+            if cur.fetchone() is None:
+                cur.execute(sql)
+                cur.execute(f"INSERT INTO {MIGRATIONS_TABLE} (version, name) VALUES (%s, %s)", (version, name))
+                done.append(version)
+        conn.commit()
+    return done
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def explain_checks(conn, queries=CHECK_QUERIES):
+    """EXPLAIN each query with sequential scans discouraged; flag those still needing one.
+
+    Tables are tiny, so the planner would happily seq-scan everything; turning
+    enable_seqscan off asks "is there a usable index at all?" instead.
+    """
+    results = []
+    with conn.cursor() as cur:
+        for label, query in queries.items():
+            cur.execute("SET LOCAL enable_seqscan = off")
+            cur.execute(f"EXPLAIN (FORMAT JSON) {query}")
+            plan = cur.fetchone()[0]
+            plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+            nodes = list(_plan_nodes(plan))
+            seq_scans = sorted({n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan"})
+            indexes = sorted({n["Index Name"] for n in nodes if "Index Name" in n})
+            results.append({
+                "query": label,
+                "ok": not seq_scans,
+                "seq_scans": seq_scans,
+                "indexes": indexes,
+                "cost": plan["Total Cost"],
+            })
+            conn.rollback()  # EXPLAIN on UPDATE does not execute it, but reset the SET LOCAL
+    return results
+
+
+def slow_statements(conn, limit=10):
+    """Top statements by mean time from pg_stat_statements, or None if the extension is missing"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'")
+        if cur.fetchone() is None:
+            conn.rollback()
+            return None
+        # PostgreSQL 13 renamed *_time to *_exec_time
+        cur.execute(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'pg_stat_statements' AND column_name = 'mean_exec_time'"
+        )
+        prefix = "_exec" if cur.fetchone() else ""
+        cur.execute(f"""
+            SELECT query, calls, mean{prefix}_time, total{prefix}_time, rows
+            FROM pg_stat_statements
+            WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+            ORDER BY mean{prefix}_time DESC
+            LIMIT %s
+        """, (limit,))
+        rows = cur.fetchall()
+    conn.rollback()
+    return [
+        {"query": " ".join(query.split())[:120], "calls": calls,
+         "mean_ms": mean_ms, "total_ms": total_ms, "rows": n_rows}
+        for query, calls, mean_ms, total_ms, n_rows in rows
+    ]
+
+
+def print_report(conn, limit=10):
+    print("EXPLAIN checks (enable_seqscan = off)")
+    for r in explain_checks(conn):
+        verdict = "ok  " if r["ok"] else "SEQ "
+        detail = ", ".join(r["indexes"]) if r["ok"] else "seq scan on " + ", ".join(r["seq_scans"])
+        print(f"  {verdict} {r['query']:<28} cost={r['cost']:>10.2f}  {detail}")
+
+    statements = slow_statements(conn, limit)
+    print()
+    if statements is None:
+        print("pg_stat_statements is not installed; add it to shared_preload_libraries and run")
+        print("  CREATE EXTENSION pg_stat_statements;")
+        return
+    print(f"Slowest {len(statements)} statements by mean time (pg_stat_statements)")
+    for s in statements:
+        print(f"  {s['mean_ms']:>9.2f} ms  x{s['calls']:<6} {s['query']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Task database schema and query checks")
+    parser.add_argument("command", choices=["migrate", "status", "report"])
+    parser.add_argument("--limit", type=int, default=10, help="statements shown by report")
+    args = parser.parse_args()
+
+    conn = connect_db()
+    try:
+        if args.command == "migrate":
+            applied = migrate(conn)
+            print(f"Applied migrations: {applied}" if applied else "Schema is up to date")
+        elif args.command == "status":
+            applied = applied_versions(conn)
+            for version, name, _ in MIGRATIONS:
+                print(f"  {'applied' if version in applied else 'pending':<8} {version:04d} {name}")
+        else:
+            print_report(conn, args.limit)
+    finally:
+        conn.close()
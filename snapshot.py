@@ -0,0 +1,152 @@
+"""Precompute every dashboard artifact into a versioned snapshot.
+
+Cron-friendly, run from the repo root:
+
+    python snapshot.py            # performance artifacts
+    python snapshot.py --keep 5   # snapshot directories kept (default 3)
+
+Each run writes data/snapshots/<timestamp>/ (Parquet tables + summary.json),
+points data/snapshots/latest.json at it and deletes all but the newest
+snapshots. The app loads the latest snapshot instead of recomputing.
+"""
+import os
+import json
+import shutil
+import argparse
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from facts import PERFORMANCE_FILE, fact_files
+from metrics import load_performance_data, performance_artifacts
+from redistribution import MONTHS, CUTOFFS, redistribution_cube
+
+SNAPSHOT_DIR = "data/snapshots"
+LATEST_FILE = "latest.json"
+KEEP_SNAPSHOTS = 3
+
+
+def data_version(filepath=PERFORMANCE_FILE):
+    """Size/mtime of every fact file, so appending a year invalidates the snapshot"""
+    stats = [os.stat(path) for path in fact_files(filepath)]
+    return "_".join(f"{stat.st_size}-{int(stat.st_mtime)}" for stat in stats)
+
+
+def _plain(values):
+    return {key: float(value) for key, value in values.items()}
+
+
+def cube_frame(cube):
+    """Redistribution cube as a long table (category x cutoff x month)"""
+    n_cat = len(cube["categories"])
+    return pd.DataFrame({
+        "category": np.repeat(cube["categories"], len(CUTOFFS) * len(MONTHS)),
+        "cutoff": np.tile(np.repeat(CUTOFFS, len(MONTHS)), n_cat),
+        "bulan": np.tile(MONTHS, n_cat * len(CUTOFFS)),
+        "redistributed": cube["redistributed"].ravel(),
+    })
+
+
+def _cube_from_frames(base, redistributed):
+    categories = base["category"].to_numpy()
+    n_cat = len(categories)
+    return {
+        "categories": categories,
+        "actual": base[[f"actual_{m}" for m in MONTHS]].to_numpy(),
+        "target": base[[f"target_{m}" for m in MONTHS]].to_numpy(),
+        "excess": base[[f"excess_{k}" for k in CUTOFFS]].to_numpy(),
+        "redistributed": redistributed["redistributed"].to_numpy().reshape(n_cat, len(CUTOFFS), len(MONTHS)),
+    }
+
+
+def prune_snapshots(out_dir=SNAPSHOT_DIR, keep=KEEP_SNAPSHOTS):
+    """Delete all but the newest `keep` snapshot directories (names sort by time); returns the deleted paths"""
+    versions = sorted(name for name in os.listdir(out_dir) if os.path.isdir(os.path.join(out_dir, name)))
+    with open(os.path.join(out_dir, LATEST_FILE)) as f:
+        latest = json.load(f)["version"]
+    deleted = [os.path.join(out_dir, name) for name in versions[:max(0, len(versions) - keep)] if name != latest]
+    for path in deleted:
+        shutil.rmtree(path)
+    return deleted
+
+
+def build_snapshot(out_dir=SNAPSHOT_DIR, as_of=None, keep=KEEP_SNAPSHOTS):
+    """Compute all artifacts, write them to a new snapshot directory, mark it latest and prune old ones"""
+    as_of = as_of or datetime.datetime.now()
+    df = load_performance_data()
+    artifacts = performance_artifacts(df)
+    cube = redistribution_cube(df)
+
+    version = as_of.strftime("%Y%m%dT%H%M%S")
+    path = os.path.join(out_dir, version)
+    os.makedirs(path, exist_ok=True)
+
+    artifacts["timeline"].to_parquet(os.path.join(path, "timeline.parquet"), index=False)
+    artifacts["forecast"].to_parquet(os.path.join(path, "forecast.parquet"), index=False)
+
+    base = pd.DataFrame({"category": cube["categories"]})
+    for i, m in enumerate(MONTHS):
+        base[f"actual_{m}"] = cube["actual"][:, i]
+        base[f"target_{m}"] = cube["target"][:, i]
+    for i, k in enumerate(CUTOFFS):
+        base[f"excess_{k}"] = cube["excess"][:, i]
+    base.to_parquet(os.path.join(path, "redistribution_base.parquet"), index=False)
+    cube_frame(cube).to_parquet(os.path.join(path, "redistribution.parquet"), index=False)
+
+    summary = {
+        "as_of": as_of.isoformat(timespec="seconds"),
+        "data_version": data_version(),
+        "metrics_excl": _plain(artifacts["metrics_excl"]),
+        "metrics_incl": _plain(artifacts["metrics_incl"]),
+        "projection": artifacts["projection"],
+    }
+
+    with open(os.path.join(path, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+
+    tmp = os.path.join(out_dir, LATEST_FILE + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump({"version": version}, f)
+    os.replace(tmp, os.path.join(out_dir, LATEST_FILE))
+    prune_snapshots(out_dir, keep)
+    return path
+
+
+def load_latest_snapshot(out_dir=SNAPSHOT_DIR):
+    """The latest snapshot as {summary..., timeline, forecast, cube}, or None"""
+    pointer = os.path.join(out_dir, LATEST_FILE)
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer) as f:
+        path = os.path.join(out_dir, json.load(f)["version"])
+
+    with open(os.path.join(path, "summary.json")) as f:
+        snapshot = json.load(f)
+    snapshot["as_of"] = datetime.datetime.fromisoformat(snapshot["as_of"])
+    snapshot["timeline"] = pd.read_parquet(os.path.join(path, "timeline.parquet"))
+    snapshot["forecast"] = pd.read_parquet(os.path.join(path, "forecast.parquet"))
+    snapshot["cube"] = _cube_from_frames(
+        pd.read_parquet(os.path.join(path, "redistribution_base.parquet")),
+        pd.read_parquet(os.path.join(path, "redistribution.parquet")),
+    )
+    return snapshot
+
+
+def is_fresh(snapshot, today=None):
+    """Snapshot matches the current performance data and the current month (MtD metrics)"""
+    today = today or datetime.date.today()
+    return (
+        snapshot is not None
+        and snapshot["data_version"] == data_version()
+        and (snapshot["as_of"].year, snapshot["as_of"].month) == (today.year, today.month)
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a dashboard snapshot")
+    parser.add_argument("--out", default=SNAPSHOT_DIR)
+    parser.add_argument("--keep", type=int, default=KEEP_SNAPSHOTS, help="snapshot directories kept")
+    args = parser.parse_args()
+
+    print(f"Snapshot written to {build_snapshot(args.out, keep=max(1, args.keep))}")
@@ -0,0 +1,172 @@
+"""Task history: "state as of" queries and burndown/burnup from the task event log.
+
+Every task write appends the full row to task_events (write_queue.py); the
+state of all tasks at time X is the latest materialized snapshot before X
+plus the newest event per task after it, so no query replays the whole log.
+Materialize a snapshot periodically (cron), run from the repo root:
+
+    python task_history.py snapshot          # snapshot as of an hour ago
+    python task_history.py as-of 2025-06-30  # print the task table at that date
+"""
+import argparse
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from db import connect_db
+from tasks import expand_units
+from tracing import span
+from write_queue import TASK_FIELDS
+
+# in-flight flush transactions stamp events with their start time; snapshot behind them
+SNAPSHOT_LAG = datetime.timedelta(hours=1)
+DATE_COLUMNS = ["start_date", "due_date"]
+PERIODS = {"W-SUN": "Weekly", "ME": "Monthly"}
+ALL_UNITS = "All units"
+
+STATE_AS_OF_SQL = """
+    WITH base AS (
+        SELECT MAX(as_of) AS as_of FROM task_snapshots WHERE as_of <= %(at)s
+    ), snap AS (
+        SELECT s.task_id, s.state, s.as_of AS occurred_at
+        FROM task_snapshots s JOIN base ON s.as_of = base.as_of
+    ), delta AS (
+        SELECT DISTINCT ON (e.task_id) e.task_id, e.state, e.occurred_at
+        FROM task_events e, base
+        WHERE e.occurred_at <= %(at)s AND (base.as_of IS NULL OR e.occurred_at > base.as_of)
+        ORDER BY e.task_id, e.occurred_at DESC, e.id DESC
+    )
+    SELECT task_id, COALESCE(delta.state, snap.state), COALESCE(delta.occurred_at, snap.occurred_at)
+    FROM snap FULL JOIN delta USING (task_id)
+"""
+
+EVENTS_SQL = """
+    SELECT task_id, state, occurred_at FROM task_events
+    WHERE occurred_at > %s AND occurred_at <= %s
+    ORDER BY occurred_at, id
+"""
+
+
+def _states_frame(rows):
+    """(task_id, state JSON, occurred_at) rows as one column per task field"""
+    df = pd.DataFrame(
+        [{"task_id": task_id, "occurred_at": occurred_at, **{name: state.get(name) for name in TASK_FIELDS}}
+         for task_id, state, occurred_at in rows],
+        columns=["task_id", "occurred_at", *TASK_FIELDS],
+    )
+    df["occurred_at"] = pd.to_datetime(df["occurred_at"])
+    for name in DATE_COLUMNS:
+        df[name] = pd.to_datetime(df[name], errors="coerce")
+    return df
+
+
+def _end_of_day(day):
+    return pd.Timestamp(day).normalize() + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+
+
+def tasks_as_of(at):
+    """Every task as it was at `at` (a date means the end of that day)"""
+    at = _end_of_day(at) if isinstance(at, datetime.date) and not isinstance(at, datetime.datetime) else at
+    with span("task_history.as_of"):
+        conn = connect_db()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(STATE_AS_OF_SQL, {"at": at})
+                rows = cur.fetchall()
+        finally:
+            conn.close()
+    return _states_frame(rows).rename(columns={"task_id": "id"}).sort_values("id", ignore_index=True)
+
+
+def period_ends(start, end, freq="W-SUN"):
+    """End-of-day timestamps closing each period in [start, end], the last one partial"""
+    ends = list(pd.date_range(start, end, freq=freq))
+    if not ends or ends[-1].date() < pd.Timestamp(end).date():
+        ends.append(pd.Timestamp(end))
+    return pd.DatetimeIndex([_end_of_day(day) for day in ends])
+
+
+def task_states(start, end, freq="W-SUN"):
+    """Task state at the end of every period, long format (as_of, task_id, fields).
+
+    Two queries: the state at the first period end (snapshot + delta) and the
+    events after it. Later periods are resolved in memory by an as-of join of
+    the (period end x task) grid against those events.
+    """
+    as_of = period_ends(start, end, freq)
+    first, last = as_of[0], as_of[-1]
+    with span("task_history.states", periods=len(as_of)) as sp:
+        conn = connect_db()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(STATE_AS_OF_SQL, {"at": first})
+                base = _states_frame(cur.fetchall())
+                cur.execute(EVENTS_SQL, (first, last))
+                events = _states_frame(cur.fetchall())
+        finally:
+            conn.close()
+        sp.set(events=len(events))
+
+    base["occurred_at"] = first  # the base state holds from the first period end on
+    changes = pd.concat([base, events], ignore_index=True).sort_values("occurred_at", kind="stable")
+    task_ids = np.unique(changes["task_id"].to_numpy())
+    grid = pd.DataFrame({
+        "as_of": np.repeat(as_of.to_numpy(), len(task_ids)),
+        "task_id": np.tile(task_ids, len(as_of)),
+    })
+    states = pd.merge_asof(grid, changes, left_on="as_of", right_on="occurred_at", by="task_id")
+    # tasks created after a period end have no state there yet
+    return states.dropna(subset=["occurred_at"]).drop(columns="occurred_at").reset_index(drop=True)
+
+
+def burn_chart(states):
+    """Per (as_of, unit): scope, completed (burnup), remaining (burndown) and overdue task counts.
+
+    A task shared by units counts for each of them; the ALL_UNITS rows count it once.
+    """
+    expanded = pd.concat([expand_units(states), states.assign(expanded_unit=ALL_UNITS)], ignore_index=True)
+    completed = expanded["status"].eq("Completed")
+    overdue = ~completed & (expanded["due_date"] < expanded["as_of"].dt.normalize())
+    counts = (
+        expanded.assign(completed=completed, overdue=overdue)
+        .groupby(["as_of", "expanded_unit"])
+        .agg(scope=("task_id", "size"), completed=("completed", "sum"), overdue=("overdue", "sum"))
+        .reset_index()
+        .rename(columns={"expanded_unit": "unit"})
+    )
+    counts["remaining"] = counts["scope"] - counts["completed"]
+    return counts
+
+
+def materialize_snapshot(conn, as_of=None):
+    """Store the state of every task at `as_of` (default: SNAPSHOT_LAG ago); returns (as_of, rows written)"""
+    as_of = as_of or (datetime.datetime.now() - SNAPSHOT_LAG).replace(microsecond=0)
+    with conn.cursor() as cur:
+        cur.execute(
+            f"INSERT INTO task_snapshots (as_of, task_id, state) "
+            f"SELECT %(at)s, task_id, state FROM ({STATE_AS_OF_SQL}) AS latest (task_id, state, occurred_at) "
+            "ON CONFLICT DO NOTHING",
+            {"at": as_of},
+        )
+        written = cur.rowcount
+    conn.commit()
+    return as_of, written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Task history snapshots and as-of queries")
+    parser.add_argument("command", choices=["snapshot", "as-of"])
+    parser.add_argument("date", nargs="?", help="YYYY-MM-DD for as-of")
+    args = parser.parse_args()
+
+    if args.command == "snapshot":
+        conn = connect_db()
+        try:
+            as_of, written = materialize_snapshot(conn)
+        finally:
+            conn.close()
+        print(f"Snapshot as of {as_of}: {written} tasks")
+    else:
+        day = datetime.date.fromisoformat(args.date) if args.date else datetime.date.today()
+        print(tasks_as_of(day).to_string(index=False))
@@ -0,0 +1,145 @@
+import math
+import re
+import hashlib
+import threading
+from collections import Counter
+
+import pandas as pd
+
+TEXT_COLUMNS = ["task_name", "assigned_unit", "status", "follow_up",
+                "completed_activities", "pending_activities"]
+
+STOPWORDS = {
+    "dan", "yang", "di", "ke", "dari", "untuk", "dengan", "pada", "dalam", "atau",
+    "ini", "itu", "terkait", "oleh", "sebagai", "akan", "telah", "sudah", "belum",
+    "the", "a", "an", "and", "or", "of", "to", "in", "on", "for", "is", "are",
+    "what", "which", "how", "task", "tasks",
+}
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords and single characters"""
+    return [
+        tok for tok in _TOKEN_RE.findall(str(text).lower())
+        if len(tok) > 1 and tok not in STOPWORDS
+    ]
+
+
+def build_task_documents(tasks_df, subtasks_df=None):
+    """One searchable text per task id: task columns plus its subtasks"""
+    subtask_text = {}
+    if subtasks_df is not None and not subtasks_df.empty:
+        subtask_text = (
+            subtasks_df.dropna(subset=["sub_task"])
+            .groupby("task_id")["sub_task"]
+            .agg(lambda s: " ".join(s.astype(str)))
+            .to_dict()
+        )
+
+    cols = [c for c in TEXT_COLUMNS if c in tasks_df.columns]
+    texts = tasks_df[cols].fillna("").astype(str).agg(" ".join, axis=1)
+    return {
+        task_id: f"{text} {subtask_text.get(task_id, '')}"
+        for task_id, text in zip(tasks_df["id"], texts)
+    }
+
+
+class TaskIndex:
+    """BM25 index over task documents, updated incrementally by content hash"""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._hashes = {}      # doc id -> content hash
+        self._lengths = {}     # doc id -> token count
+        self._doc_terms = {}   # doc id -> Counter of terms
+        self._postings = {}    # term -> {doc id: term frequency}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def _remove(self, doc_id):
+        for term in self._doc_terms.pop(doc_id):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id)
+        del self._hashes[doc_id]
+
+    def _add(self, doc_id, text, digest):
+        terms = Counter(tokenize(text))
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+        self._doc_terms[doc_id] = terms
+        self._lengths[doc_id] = sum(terms.values())
+        self._total_length += self._lengths[doc_id]
+        self._hashes[doc_id] = digest
+
+    def sync(self, documents):
+        """Re-index only added, changed or deleted documents; returns the number touched"""
+        touched = 0
+        with self._lock:
+            for doc_id in set(self._hashes) - set(documents):
+                self._remove(doc_id)
+                touched += 1
+
+            for doc_id, text in documents.items():
+                digest = hashlib.md5(text.encode("utf-8")).hexdigest()
+                if self._hashes.get(doc_id) == digest:
+                    continue
+                if doc_id in self._hashes:
+                    self._remove(doc_id)
+                self._add(doc_id, text, digest)
+                touched += 1
+        return touched
+
+    def search(self, query, top_k=5):
+        """Return [(doc id, score)] of the best matching documents"""
+        with self._lock:
+            n_docs = len(self._hashes)
+            if not n_docs:
+                return []
+            avg_len = self._total_length / n_docs
+
+            scores = Counter()
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_len)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return scores.most_common(top_k)
+
+
+def format_task_context(tasks_df, hits, max_chars=400):
+    """Compact text block of the retrieved tasks for the LLM prompt"""
+    if not hits:
+        return "No related tasks found."
+
+    by_id = tasks_df.set_index("id")
+    blocks = []
+    for doc_id, _ in hits:
+        if doc_id not in by_id.index:
+            continue
+        task = by_id.loc[doc_id]
+        lines = [
+            f"Task: {task['task_name']}",
+            f"Unit: {task['assigned_unit']} | Status: {task['status']} | "
+            f"Start: {task['start_date']} | Due: {task['due_date']}",
+        ]
+        for col, label in [("follow_up", "Follow up"),
+                           ("completed_activities", "Completed"),
+                           ("pending_activities", "Pending")]:
+            value = task.get(col)
+            if pd.notna(value) and str(value).strip():
+                lines.append(f"{label}: {str(value).strip()[:max_chars]}")
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
@@ -0,0 +1,182 @@
+import os
+import re
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from db import connect_db, db_breaker
+from workdays import workdays_until
+from tracing import span
+
+WORKLOAD_FREQS = {"D": "Daily", "W": "Weekly"}
+
+TASK_FILE = "task.csv"
+SUBTASK_FILE = "subtask.csv"
+LAST_GOOD_FILE = "data/cache/tasks_last_good.parquet"
+SUBTASK_COLUMNS = ["id", "task_id", "sub_task", "start_date", "end_date"]
+
+
+_last_good_hash = None
+
+
+def _save_last_good(df, path=LAST_GOOD_FILE):
+    """Persist the latest successful DB read when it changed; a failed write must not break the page"""
+    global _last_good_hash
+    content_hash = int(pd.util.hash_pandas_object(df, index=False).sum()) if len(df) else 0
+    if content_hash == _last_good_hash and os.path.exists(path):
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        _last_good_hash = content_hash
+    except Exception:
+        pass
+
+
+def load_tasks():
+    """Tasks from the database, or a fallback when the DB is unreachable.
+
+    Returns (tasks_df, error) where error is None when the DB answered. The
+    fallback is the last good DB read (Parquet) if there is one, else task.csv;
+    tasks_df.attrs carries "source" ("db", "snapshot" or "csv") and "as_of".
+    """
+    with span("load.tasks") as sp:
+        try:
+            conn = connect_db()
+            try:
+                df = pd.read_sql("SELECT * FROM tasks;", conn)
+            finally:
+                conn.close()
+            _save_last_good(df)
+            df.attrs.update(source="db", as_of=datetime.datetime.now())
+            sp.set(source="db", rows=len(df))
+            return df, None
+        except Exception as e:
+            if os.path.exists(LAST_GOOD_FILE):
+                df = pd.read_parquet(LAST_GOOD_FILE)
+                df.attrs.update(source="snapshot",
+                                as_of=datetime.datetime.fromtimestamp(os.path.getmtime(LAST_GOOD_FILE)))
+            else:
+                df = pd.read_csv(TASK_FILE)
+                df.attrs.update(source="csv",
+                                as_of=datetime.datetime.fromtimestamp(os.path.getmtime(TASK_FILE)))
+            sp.set(source=df.attrs["source"], rows=len(df), circuit=db_breaker.state)
+            return df, e
+
+
+def load_subtasks(filepath=SUBTASK_FILE):
+    """Subtasks with parsed (day-first) dates; empty when the file is missing"""
+    with span("load.subtasks") as sp:
+        if not os.path.exists(filepath):
+            return pd.DataFrame(columns=SUBTASK_COLUMNS).astype({"start_date": "datetime64[ns]", "end_date": "datetime64[ns]"})
+        df = pd.read_csv(filepath)
+        df["start_date"] = pd.to_datetime(df["start_date"], errors="coerce", dayfirst=True)
+        df["end_date"] = pd.to_datetime(df["end_date"], errors="coerce", dayfirst=True)
+        sp.set(rows=len(df))
+        return df
+
+
+def expand_units(tasks_df):
+    """One row per (task, unit) for tasks shared between units ("A & B")"""
+    return tasks_df.assign(expanded_unit=tasks_df["assigned_unit"].str.split(" & ")).explode("expanded_unit")
+
+
+def filter_tasks(tasks_df, statuses, units, search=""):
+    """Tasks with one of `statuses`, assigned to any of `units`, whose name contains `search`"""
+    if units:
+        unit_pattern = "|".join(re.escape(unit) for unit in units)
+        unit_mask = tasks_df["assigned_unit"].str.contains(unit_pattern, na=False)
+    else:
+        unit_mask = pd.Series(False, index=tasks_df.index)
+    return tasks_df[
+        tasks_df["status"].isin(statuses)
+        & unit_mask
+        & tasks_df["task_name"].str.contains(search, case=False, na=False)
+    ]
+
+
+def status_counts(tasks_df):
+    """Total and per-status task counts for the overview tiles"""
+    counts = tasks_df["status"].value_counts()
+    return {
+        "total": len(tasks_df),
+        "completed": int(counts.get("Completed", 0)),
+        "in_progress": int(counts.get("In Progress", 0)),
+        "not_started": int(counts.get("Not Started", 0)),
+        "by_status": counts,
+    }
+
+
+def tasks_by_unit(expanded_df):
+    """Task counts per (unit, status) from an expand_units frame"""
+    return expanded_df.groupby(["expanded_unit", "status"]).size().reset_index(name="task_count")
+
+
+def task_alerts(tasks_df, today=None):
+    """Tasks close to their deadline (next 7 days), overdue and unconfirmed"""
+    today = today or datetime.date.today()
+    one_week_from_now = today + datetime.timedelta(days=7)
+    due = pd.to_datetime(tasks_df["due_date"], dayfirst=True, errors="coerce").dt.date
+    open_task = tasks_df["status"] != "Completed"
+
+    close_to_deadline = tasks_df[
+        (due >= today) & (due <= one_week_from_now) &
+        (tasks_df["status"].isin(["Not Started", "In Progress"]))
+    ]
+    close_to_deadline = close_to_deadline.assign(
+        workdays_left=workdays_until(pd.to_datetime(close_to_deadline["due_date"], dayfirst=True).values, today)
+    )
+
+    overdue = tasks_df[(due < today) & open_task]
+
+    unconfirmed = tasks_df[
+        (tasks_df["assigned_unit"].isna() | tasks_df["due_date"].isna()) & open_task
+    ]
+
+    return {
+        "close_to_deadline": close_to_deadline,
+        "overdue": overdue,
+        "unconfirmed": unconfirmed,
+    }
+
+
+def unit_workload(tasks_df, freq="W", start=None, end=None):
+    """Active tasks per unit per day ("D") or Monday-starting week ("W"), as a (unit x period) frame.
+
+    A task is active in every period its [start_date, due_date] touches. Counts
+    come from a difference array: +1 at each task's first period, -1 after its
+    last, then a cumulative sum along time, so the cost does not grow with
+    task duration. `start` / `end` clip the range (default: the task dates).
+    """
+    expanded = expand_units(tasks_df)
+    first = pd.to_datetime(expanded["start_date"], errors="coerce").to_numpy("datetime64[D]")
+    last = pd.to_datetime(expanded["due_date"], errors="coerce").to_numpy("datetime64[D]")
+    valid = ~np.isnat(first) & ~np.isnat(last) & (last >= first) & expanded["expanded_unit"].notna().to_numpy()
+    units, names = pd.factorize(expanded["expanded_unit"].to_numpy()[valid], sort=True)
+    first, last = first[valid], last[valid]
+
+    start = np.datetime64(pd.Timestamp(start).date(), "D") if start is not None else (first.min() if len(first) else None)
+    end = np.datetime64(pd.Timestamp(end).date(), "D") if end is not None else (last.max() if len(last) else None)
+    if start is None or end is None or end < start:
+        return pd.DataFrame(index=pd.Index([], name="unit"))
+    step = 7 if freq == "W" else 1
+    if step == 7:
+        start -= (start.astype(np.int64) + 3) % 7  # back to Monday (day 0, 1970-01-01, was a Thursday)
+
+    n_periods = int((end - start).astype(int)) // step + 1
+    first_period = (first - start).astype(int) // step
+    last_period = (last - start).astype(int) // step
+    inside = (last_period >= 0) & (first_period < n_periods)
+    first_period = np.clip(first_period[inside], 0, n_periods - 1)
+    last_period = np.clip(last_period[inside], 0, n_periods - 1)
+    units = units[inside]
+
+    width = n_periods + 1
+    diff = (np.bincount(units * width + first_period, minlength=len(names) * width)
+            - np.bincount(units * width + last_period + 1, minlength=len(names) * width))
+    active = diff.reshape(len(names), width).cumsum(axis=1)[:, :n_periods]
+    periods = pd.date_range(pd.Timestamp(start), periods=n_periods, freq=f"{step}D")
+    return pd.DataFrame(active, index=pd.Index(names, name="unit"), columns=periods)
@@ -0,0 +1,53 @@
+"""Smoke test: index.py runs top to bottom with the task database reachable.
+
+The database-backed loaders are replaced by synthetic tasks, so no Postgres
+or LLM is needed; everything else (performance files, charts, fragments)
+runs for real through streamlit.testing.
+"""
+import pandas as pd
+import pytest
+
+import dashboard_context
+import task_history
+import write_queue
+from benchmarks.synthetic import tasks_frame
+
+APP_FILE = "index.py"
+
+
+@pytest.fixture
+def tasks():
+    df = tasks_frame()
+    df.attrs.update(source="db", as_of=pd.Timestamp.now().to_pydatetime())
+    return df
+
+
+@pytest.fixture
+def app(monkeypatch, tasks):
+    from streamlit.testing.v1 import AppTest
+
+    def states(start, end, freq="W-SUN"):
+        """Every task unchanged at each period end, shaped like task_history.task_states"""
+        frame = tasks.rename(columns={"id": "task_id"}).assign(
+            start_date=pd.to_datetime(tasks["start_date"]), due_date=pd.to_datetime(tasks["due_date"])
+        )
+        return pd.concat([frame.assign(as_of=end) for end in task_history.period_ends(start, end, freq)],
+                         ignore_index=True)
+
+    monkeypatch.setitem(dashboard_context.SOURCES, "tasks", lambda: (tasks, None))
+    monkeypatch.setattr(task_history, "task_states", states)
+    monkeypatch.setattr(task_history, "tasks_as_of", lambda day: tasks.copy())
+    monkeypatch.setattr(write_queue, "start_flusher", lambda: None)
+    monkeypatch.setattr(write_queue, "queued_writes", lambda *args, **kwargs: [])
+    monkeypatch.setattr(write_queue, "schema_problem", lambda: None)
+
+    at = AppTest.from_file(APP_FILE, default_timeout=120)
+    at.secrets["GROQ_API_KEY"] = "stub"
+    return at
+
+
+def test_app_runs_with_task_history(app):
+    app.run()
+    assert not app.exception, [e.message for e in app.exception]
+    assert any(w.label == "History range" for w in app.date_input)
+    assert any(w.label == "Workload by" for w in app.radio)
@@ -0,0 +1,50 @@
+"""Export files read back to the frames they were written from."""
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from exports import get_export
+
+pytest.importorskip("openpyxl")  # pandas reads .xlsx through openpyxl
+
+
+@pytest.fixture
+def tasks():
+    n = 25
+    return pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "task_name": [f"Task {i}" for i in range(n)],
+        "progress": [np.nan if i % 4 == 0 else i / 10 for i in range(n)],
+        "status": pd.Categorical(["Completed", "In Progress", "Not Started", None, "Completed"] * 5),
+        "due_date": [datetime.date(2025, 1, 1) + datetime.timedelta(days=i) for i in range(n)],
+        "last_updated": pd.date_range("2025-01-01 08:00", periods=n, freq="h"),
+        "overdue": [i % 3 == 0 for i in range(n)],
+    })
+
+
+def _as_read_back(df):
+    """What the file should hold: dates come back as timestamps, categoricals as text"""
+    expected = df.copy()
+    expected["status"] = expected["status"].astype(object)
+    expected["due_date"] = pd.to_datetime(expected["due_date"])
+    return expected
+
+
+def test_xlsx_round_trip(tmp_path, tasks):
+    sheets = {"Tasks": tasks, "Head": tasks.head(3)}
+    path = get_export("tasks", {"test": 1}, "xlsx", lambda: sheets, out_dir=tmp_path, chunk_rows=7)
+
+    read = pd.read_excel(path, sheet_name=None)
+    assert list(read) == ["Tasks", "Head"]
+    for name, df in sheets.items():
+        pd.testing.assert_frame_equal(read[name], _as_read_back(df), check_dtype=False)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_single_sheet_round_trip(tmp_path, tasks, fmt):
+    path = get_export("tasks", {"test": 1}, fmt, lambda: {"Tasks": tasks}, out_dir=tmp_path, chunk_rows=7)
+    read = pd.read_csv(path, parse_dates=["due_date", "last_updated"]) if fmt == "csv" else pd.read_parquet(path)
+    expected = _as_read_back(tasks) if fmt == "csv" else tasks
+    pd.testing.assert_frame_equal(read, expected, check_dtype=False, check_categorical=False)
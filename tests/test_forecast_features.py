@@ -0,0 +1,54 @@
+"""The vectorized features and the batched correlation pruning match the notebook.
+
+Run from the repo root:
+
+    python -m pytest tests
+"""
+import pandas as pd
+import pytest
+
+from forecast_features import FEATURE_COLUMNS, build_features, prune_correlated_features
+from forecast_pipeline import CORR_THRESHOLD
+from benchmarks.features import DAILY_FILE, notebook_features, remove_highly_correlated_features
+
+TRAIN_END = pd.Timestamp("2024-11-30")  # the notebook's split date
+# the notebook only filled these on holiday rows; build_features computes them for every date
+CHANGED_COLUMNS = ["days_since_last_holiday", "days_until_next_holiday"]
+
+
+@pytest.fixture(scope="module")
+def raw():
+    return pd.read_csv(DAILY_FILE)
+
+
+@pytest.fixture(scope="module")
+def features(raw):
+    daily = raw.rename(columns={"Day of Date": "date"})
+    daily["date"] = pd.to_datetime(daily["date"], format="%m/%d/%Y")
+    return build_features(daily)
+
+
+def test_features_match_notebook(raw, features):
+    for segment, expected in notebook_features(raw):
+        rows = (features["segment"] == segment) & (features["Day of Date"] <= TRAIN_END)
+        actual = features[rows].drop(columns=["Day of Date", "segment"]).reset_index(drop=True)
+        pd.testing.assert_frame_equal(
+            actual.drop(columns=CHANGED_COLUMNS), expected.drop(columns=CHANGED_COLUMNS), check_dtype=False,
+            obj=segment,
+        )
+
+
+def test_feature_columns_in_notebook_order(features):
+    assert list(features.columns) == ["Day of Date", "segment", *FEATURE_COLUMNS]
+
+
+@pytest.mark.parametrize("threshold", [0.6, CORR_THRESHOLD])
+def test_prune_matches_notebook(features, threshold):
+    train_mask = (features["Day of Date"] <= TRAIN_END).to_numpy()
+    kept = prune_correlated_features(features, train_mask, threshold=threshold)
+
+    for segment, train in features[train_mask].groupby("segment"):
+        expected = remove_highly_correlated_features(
+            train.drop(columns=["Day of Date", "segment"]), threshold=threshold
+        )
+        assert kept[segment] == list(expected.columns), segment
@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import uuid
+import functools
+import threading
+from collections import deque
+from contextvars import ContextVar
+
+TRACE_ENV = "DASHBOARD_TRACE"          # "1" turns tracing on for every rerun
+TRACE_FILE_ENV = "DASHBOARD_TRACE_FILE"  # optional JSON-lines sink
+RERUN_WINDOW = 500  # latest rerun durations kept per scope for the quantiles
+
+_current = ContextVar("dashboard_trace", default=None)
+# innermost open span of this execution context; loader threads each run in a copied context
+_parent = ContextVar("dashboard_span", default=None)
+_totals = {}  # span name -> [count, seconds], process-wide for Prometheus
+_reruns = {}  # rerun scope ("app" or a fragment name) -> [total reruns, deque of recent seconds]
+_totals_lock = threading.Lock()
+
+
+class _NoopSpan:
+    """Returned when tracing is off so instrumented code costs one lookup"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Trace:
+    """All spans recorded during one script rerun (or one fragment rerun)"""
+
+    def __init__(self, scope="app"):
+        self.scope = scope
+        self.rerun_id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.wall_started = time.time()
+        self.spans = []
+        self.duration = None
+
+
+class Span:
+    __slots__ = ("trace", "name", "attrs", "start", "duration", "depth", "_token")
+
+    def __init__(self, trace, name, attrs):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.duration = None
+
+    def __enter__(self):
+        parent = _parent.get()
+        self.depth = parent.depth + 1 if parent is not None and parent.trace is self.trace else 0
+        self._token = _parent.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.duration = time.perf_counter() - self.start
+        _parent.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.trace.spans.append(self)
+        with _totals_lock:
+            total = _totals.setdefault(self.name, [0, 0.0])
+            total[0] += 1
+            total[1] += self.duration
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+def begin_trace(enabled, scope="app"):
+    """Start (or disable) tracing for the current rerun thread"""
+    trace = Trace(scope) if enabled else None
+    _current.set(trace)
+    return trace
+
+
+def end_trace(trace):
+    if trace is None:
+        return
+    trace.duration = time.perf_counter() - trace.started
+    with _totals_lock:
+        reruns = _reruns.setdefault(trace.scope, [0, deque(maxlen=RERUN_WINDOW)])
+        reruns[0] += 1
+        reruns[1].append(trace.duration)
+    path = os.environ.get(TRACE_FILE_ENV)
+    if path:
+        with open(path, "a") as f:
+            f.write(to_jsonl(trace))
+
+
+def env_enabled():
+    return os.environ.get(TRACE_ENV) == "1"
+
+
+def span(name, **attrs):
+    """Context manager timing a block; yields an object with .set(**attrs)"""
+    trace = _current.get()
+    if trace is None:
+        return _NOOP
+    return Span(trace, name, attrs)
+
+
+def traced(name=None):
+    """Decorator form of span()"""
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return fn(*args, **kwargs)
+            with Span(_current.get(), label, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def fragment_traced(scope):
+    """Decorator for st.fragment bodies: a fragment-only rerun gets its own trace.
+
+    Apply it under @st.fragment. During a full app rerun the body is just a
+    span of the app trace; when the fragment reruns on its own the previous app
+    trace has already ended, so a new trace scoped to the fragment is started.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = _current.get()
+            if trace is None:
+                return fn(*args, **kwargs)
+            if trace.duration is None:
+                with Span(trace, f"fragment.{scope}", {}):
+                    return fn(*args, **kwargs)
+            fragment_trace = begin_trace(True, scope)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                end_trace(fragment_trace)
+        return wrapper
+    return decorator
+
+
+def rerun_stats():
+    """Rerun latency per scope in this process: count, and p50 / p95 of the recent window in milliseconds"""
+    with _totals_lock:
+        reruns = {scope: (count, sorted(values)) for scope, (count, values) in _reruns.items()}
+
+    def percentile(values, q):
+        return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+    return [
+        {"scope": scope, "reruns": count,
+         "p50_ms": round(percentile(values, 0.5), 3), "p95_ms": round(percentile(values, 0.95), 3)}
+        for scope, (count, values) in sorted(reruns.items())
+    ]
+
+
+def span_records(trace):
+    """Spans in start order as plain dicts (milliseconds relative to rerun start)"""
+    return [
+        {
+            "rerun_id": trace.rerun_id,
+            "scope": trace.scope,
+            "name": s.name,
+            "depth": s.depth,
+            "start_ms": round((s.start - trace.started) * 1000, 3),
+            "duration_ms": round(s.duration * 1000, 3),
+            **s.attrs,
+        }
+        for s in sorted(trace.spans, key=lambda s: s.start)
+    ]
+
+
+def to_jsonl(trace):
+    return "".join(json.dumps(record, default=str) + "\n" for record in span_records(trace))
+
+
+def prometheus_text():
+    """Process-wide span totals in the Prometheus text exposition format"""
+    with _totals_lock:
+        totals = {name: list(values) for name, values in _totals.items()}
+    lines = [
+        "# HELP dashboard_span_seconds_total Time spent in each traced span.",
+        "# TYPE dashboard_span_seconds_total counter",
+    ]
+    lines += [f'dashboard_span_seconds_total{{span="{name}"}} {seconds:.6f}' for name, (_, seconds) in sorted(totals.items())]
+    lines += [
+        "# HELP dashboard_span_count_total Number of times each span ran.",
+        "# TYPE dashboard_span_count_total counter",
+    ]
+    lines += [f'dashboard_span_count_total{{span="{name}"}} {count}' for name, (count, _) in sorted(totals.items())]
+    lines += [
+        "# HELP dashboard_rerun_seconds Rerun latency quantiles per scope (app or fragment).",
+        "# TYPE dashboard_rerun_seconds summary",
+    ]
+    for stat in rerun_stats():
+        for q, key in [("0.5", "p50_ms"), ("0.95", "p95_ms")]:
+            lines.append(f'dashboard_rerun_seconds{{scope="{stat["scope"]}",quantile="{q}"}} {stat[key] / 1000:.6f}')
+        lines.append(f'dashboard_rerun_seconds_count{{scope="{stat["scope"]}"}} {stat["reruns"]}')
+    return "\n".join(lines) + "\n"
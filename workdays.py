@@ -0,0 +1,103 @@
+import datetime
+from functools import lru_cache
+
+import numpy as np
+import holidays
+
+FIRST_YEAR = 2023
+YEARS_AHEAD = 2
+
+
+@lru_cache(maxsize=None)
+def holiday_array(first_year, last_year):
+    """Sorted datetime64[D] array of Indonesian public holidays for a year range"""
+    days = holidays.Indonesia(years=range(first_year, last_year + 1)).keys()
+    return np.array(sorted(days), dtype="datetime64[D]")
+
+
+class WorkdayCalendar:
+    """Indonesian business days with O(1) range counts from a cumulative array"""
+
+    def __init__(self, first_year, last_year):
+        self.first_year = first_year
+        self.last_year = last_year
+        self.start = np.datetime64(f"{first_year}-01-01", "D")
+        self.end = np.datetime64(f"{last_year + 1}-01-01", "D")
+        self.holidays = holiday_array(first_year, last_year)
+        self.busdaycal = np.busdaycalendar(holidays=self.holidays)
+
+        days = np.arange(self.start, self.end)
+        is_workday = np.is_busday(days, busdaycal=self.busdaycal)
+        # cum[i] = number of workdays before day i
+        self.cum = np.concatenate([[0], np.cumsum(is_workday)])
+
+    def _index(self, days):
+        return (np.asarray(days, dtype="datetime64[D]") - self.start).astype(np.int64)
+
+    def count(self, start, end):
+        """Workdays in [start, end), like np.busday_count; vectorized over arrays"""
+        return self.cum[self._index(end)] - self.cum[self._index(start)]
+
+    def is_workday(self, day):
+        i = self._index(day)
+        return bool(self.cum[i + 1] - self.cum[i])
+
+
+@lru_cache(maxsize=None)
+def _calendar(first_year, last_year):
+    return WorkdayCalendar(first_year, last_year)
+
+
+def get_calendar(*days):
+    """Shared calendar covering FIRST_YEAR..today+YEARS_AHEAD and any given days"""
+    years = [datetime.date.today().year + YEARS_AHEAD]
+    years += [np.datetime64(d, "Y").astype(int) + 1970 for d in days if d is not None]
+    return _calendar(min([FIRST_YEAR] + years), max(years))
+
+
+def workdays_between(start, end):
+    """Workdays from start (inclusive) to end (exclusive)"""
+    return int(get_calendar(start, end).count(start, end))
+
+
+def month_bounds(day):
+    first = day.replace(day=1)
+    next_month = (first + datetime.timedelta(days=32)).replace(day=1)
+    return first, next_month
+
+
+def year_bounds(day):
+    return datetime.date(day.year, 1, 1), datetime.date(day.year + 1, 1, 1)
+
+
+def countdown(today=None):
+    """Calendar and working days remaining/total for the current month and year"""
+    today = today or datetime.date.today()
+    month_start, month_end = month_bounds(today)
+    year_start, year_end = year_bounds(today)
+    cal = get_calendar(year_start, year_end)
+
+    return {
+        "days_to_eom": (month_end - today).days - 1,
+        "total_days_month": (month_end - month_start).days,
+        "days_to_eoy": (year_end - today).days - 1,
+        "total_days_year": (year_end - year_start).days,
+        "workdays_to_eom": int(cal.count(today, month_end)),
+        "total_workdays_month": int(cal.count(month_start, month_end)),
+        "workdays_to_eoy": int(cal.count(today, year_end)),
+        "total_workdays_year": int(cal.count(year_start, year_end)),
+    }
+
+
+def workdays_until(due_dates, today=None):
+    """Workdays from today until each due date (negative when overdue); NaT stays missing"""
+    today = np.datetime64(today or datetime.date.today(), "D")
+    due = np.asarray(due_dates, dtype="datetime64[D]")
+    valid = ~np.isnat(due)
+    result = np.full(due.shape, np.nan)
+    if valid.any():
+        cal = get_calendar(today, due[valid].min(), due[valid].max())
+        lo = np.minimum(due[valid], today)
+        hi = np.maximum(due[valid], today)
+        result[valid] = np.where(due[valid] >= today, 1, -1) * cal.count(lo, hi)
+    return result
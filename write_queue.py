@@ -0,0 +1,345 @@
+"""Durable local queue for task writes, drained to Postgres by a background flusher.
+
+The UI enqueues and returns at once. Writes survive DB outages and app
+restarts (SQLite file), are applied at most once (idempotency key recorded in
+the applied_writes table in the same transaction) and an edit made against a
+stale copy of a task is parked as a conflict instead of overwriting newer work.
+Only the session that queued a conflicting edit (its `owner`) may discard or
+force it; a write that keeps failing is parked as `failed` after MAX_ATTEMPTS
+so it cannot hold up the writes queued behind it. Every applied write also appends the new row to task_events
+(task_history.py); nothing is flushed until the database has the migrations
+that tables rely on (schema.py).
+"""
+import os
+import json
+import uuid
+import sqlite3
+import datetime
+import threading
+
+import pandas as pd
+
+from db import connect_db
+from schema import missing_migrations
+from tracing import span
+
+QUEUE_FILE = "data/cache/task_writes.sqlite"
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 5  # failed flushes of one write before it is parked for its owner to retry or discard
+FLUSH_INTERVAL = 5.0  # seconds between retries while writes are pending
+REQUIRED_MIGRATION = 6  # applied_writes (5) and task_events (6)
+CONFLICT_RETENTION = datetime.timedelta(days=7)  # unresolved conflicts/failures of ended sessions are dropped after this
+
+TASK_FIELDS = ["task_name", "assigned_unit", "start_date", "due_date", "status",
+               "follow_up", "completed_activities", "pending_activities"]
+DATE_FIELDS = {"start_date", "due_date"}
+
+_wakeup = threading.Event()
+_flusher = None
+_flusher_lock = threading.Lock()
+_schema_ready = False
+
+
+class SchemaOutdated(Exception):
+    """The task database lacks migrations the queue writes into"""
+
+    def __init__(self, missing):
+        names = ", ".join(f"{version:04d} {name}" for version, name in missing)
+        super().__init__(f"task database schema is missing migrations {names}; run `python schema.py migrate`")
+        self.missing = missing
+
+
+def new_key():
+    return uuid.uuid4().hex
+
+
+def _connect(path=QUEUE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS task_writes (
+            idempotency_key TEXT PRIMARY KEY,
+            op TEXT NOT NULL,                -- 'update' | 'insert'
+            task_id INTEGER,                 -- NULL for inserts (id assigned on flush)
+            payload TEXT NOT NULL,           -- JSON of TASK_FIELDS
+            base_last_updated TEXT,          -- last_updated the edit was made against
+            status TEXT NOT NULL DEFAULT 'pending',  -- 'pending' | 'conflict' | 'failed'
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            enqueued_at TEXT NOT NULL,
+            owner TEXT                       -- session that queued the write; resolves its conflicts
+        )
+    """)
+    # queue files created before writes had an owner
+    if "owner" not in {row[1] for row in conn.execute("PRAGMA table_info(task_writes)")}:
+        conn.execute("ALTER TABLE task_writes ADD COLUMN owner TEXT")
+    return conn
+
+
+def _plain(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, (datetime.date, datetime.datetime, pd.Timestamp)):
+        return value.isoformat()
+    return value
+
+
+def enqueue(op, fields, task_id=None, base_last_updated=None, key=None, owner=None, path=QUEUE_FILE):
+    """Queue a task write and wake the flusher; a repeated key is ignored"""
+    payload = json.dumps({name: _plain(fields.get(name)) for name in TASK_FIELDS})
+    conn = _connect(path)
+    try:
+        conn.execute(
+            "INSERT OR IGNORE INTO task_writes "
+            "(idempotency_key, op, task_id, payload, base_last_updated, enqueued_at, owner) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key or new_key(), op, task_id, payload, _plain(base_last_updated),
+             datetime.datetime.now().isoformat(timespec="seconds"), owner),
+        )
+    finally:
+        conn.close()
+    _wakeup.set()
+
+
+def queued_writes(status=None, owner=None, path=QUEUE_FILE):
+    """Queued writes, oldest first, as dicts (payload decoded); `owner` limits them to one session's"""
+    conditions = {"status = ?": status, "owner = ?": owner}
+    conditions = {sql: value for sql, value in conditions.items() if value is not None}
+    conn = _connect(path)
+    try:
+        conn.row_factory = sqlite3.Row
+        query = "SELECT * FROM task_writes"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        rows = conn.execute(query + " ORDER BY rowid", tuple(conditions.values())).fetchall()
+    finally:
+        conn.close()
+    return [{**dict(row), "payload": json.loads(row["payload"])} for row in rows]
+
+
+def discard(key, owner, path=QUEUE_FILE):
+    """Drop a conflicting or failed edit of `owner`'s; returns whether one was dropped"""
+    conn = _connect(path)
+    try:
+        cur = conn.execute(
+            "DELETE FROM task_writes WHERE idempotency_key = ? AND owner = ? AND status IN ('conflict', 'failed')",
+            (key, owner),
+        )
+    finally:
+        conn.close()
+    return cur.rowcount == 1
+
+
+def force(key, owner, path=QUEUE_FILE):
+    """Re-queue `owner`'s conflicting edit without the last_updated check (overwrite the newer version)"""
+    conn = _connect(path)
+    try:
+        cur = conn.execute(
+            "UPDATE task_writes SET status = 'pending', base_last_updated = NULL, last_error = NULL "
+            "WHERE idempotency_key = ? AND owner = ? AND status = 'conflict'", (key, owner),
+        )
+    finally:
+        conn.close()
+    _wakeup.set()
+    return cur.rowcount == 1
+
+
+def retry(key, owner, path=QUEUE_FILE):
+    """Re-queue `owner`'s failed edit with a fresh attempt budget (still conflict-checked)"""
+    conn = _connect(path)
+    try:
+        cur = conn.execute(
+            "UPDATE task_writes SET status = 'pending', attempts = 0 "
+            "WHERE idempotency_key = ? AND owner = ? AND status = 'failed'", (key, owner),
+        )
+    finally:
+        conn.close()
+    _wakeup.set()
+    return cur.rowcount == 1
+
+
+def apply_pending(tasks_df, writes):
+    """Overlay not-yet-flushed writes on the task table (read-your-writes for the UI)"""
+    pending = [w for w in writes if w["status"] == "pending"]
+    if not pending:
+        return tasks_df
+    df = tasks_df.copy()
+    new_rows = []
+    next_id = int(df["id"].max()) + 1 if len(df) else 1
+    for write in pending:
+        fields = {
+            name: (pd.Timestamp(value).date() if name in DATE_FIELDS and value else value)
+            for name, value in write["payload"].items()
+        }
+        if write["op"] == "update":
+            mask = df["id"] == write["task_id"]
+            for name, value in fields.items():
+                if name in df.columns:
+                    df.loc[mask, name] = value
+        else:
+            new_rows.append({"id": next_id, **fields})
+            next_id += 1
+    if new_rows:
+        df = pd.concat([df, pd.DataFrame(new_rows)], ignore_index=True)
+    df.attrs = tasks_df.attrs
+    return df
+
+
+# ==============================
+# FLUSHER
+# ==============================
+def _apply(cur, write):
+    """Apply one write inside the flush transaction; returns 'applied', 'duplicate' or 'conflict'"""
+    cur.execute(
+        "INSERT INTO applied_writes (idempotency_key) VALUES (%s) ON CONFLICT DO NOTHING RETURNING 1",
+        (write["idempotency_key"],),
+    )
+    if cur.fetchone() is None:
+        return "duplicate"
+
+    fields = write["payload"]
+    values = [fields[name] for name in TASK_FIELDS]
+    if write["op"] == "insert":
+        _execute_logged(
+            cur, write,
+            f"INSERT INTO tasks (id, {', '.join(TASK_FIELDS)}, last_updated) "
+            f"SELECT COALESCE(MAX(id), 0) + 1, {', '.join(['%s'] * len(TASK_FIELDS))}, NOW() FROM tasks",
+            values,
+        )
+        return "applied"
+
+    assignments = ", ".join(f"{name} = %s" for name in TASK_FIELDS)
+    query = f"UPDATE tasks SET {assignments}, last_updated = NOW() WHERE id = %s"
+    params = values + [write["task_id"]]
+    if write["base_last_updated"] is not None:
+        # someone saved this task after the user opened it: do not overwrite their work
+        query += " AND last_updated = %s"
+        params.append(write["base_last_updated"])
+    return "applied" if _execute_logged(cur, write, query, params) == 1 else "conflict"
+
+
+def _execute_logged(cur, write, query, params):
+    """Run a task INSERT/UPDATE and append the written rows to task_events in the same statement"""
+    cur.execute(
+        f"WITH written AS ({query} RETURNING *) "
+        "INSERT INTO task_events (task_id, op, idempotency_key, occurred_at, state) "
+        "SELECT id, %s, %s, last_updated, to_jsonb(written) FROM written",
+        [*params, write["op"], write["idempotency_key"]],
+    )
+    return cur.rowcount
+
+
+def check_schema(conn):
+    """Raise SchemaOutdated unless the migrations the queue writes into are applied"""
+    global _schema_ready
+    if _schema_ready:
+        return
+    missing = missing_migrations(conn, REQUIRED_MIGRATION)
+    if missing:
+        raise SchemaOutdated(missing)
+    _schema_ready = True  # migrations are append-only: once there, they stay
+
+
+def schema_problem():
+    """Why queued writes cannot be flushed (outdated schema), or None; raises if the DB is unreachable"""
+    conn = connect_db()
+    try:
+        check_schema(conn)
+    except SchemaOutdated as e:
+        return str(e)
+    finally:
+        conn.close()
+    return None
+
+
+def flush(path=QUEUE_FILE, batch_size=BATCH_SIZE):
+    """Drain one batch of pending writes in a single Postgres transaction; returns outcome counts"""
+    _purge_conflicts(path)
+    # writes that keep failing go last so they cannot fill every batch ahead of fresh ones (sort is stable)
+    batch = sorted(queued_writes("pending", path=path), key=lambda w: w["attempts"])[:batch_size]
+    if not batch:
+        return {}
+
+    outcomes = {}
+    with span("write_queue.flush", writes=len(batch)):
+        conn = connect_db()
+        try:
+            check_schema(conn)
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_xact_lock(hashtext('task_writes'))")  # one flusher at a time
+                for write in batch:
+                    cur.execute("SAVEPOINT write")
+                    try:
+                        outcome = _apply(cur, write)
+                        # a conflict must not record its idempotency key: it may be retried with force()
+                        cur.execute("ROLLBACK TO SAVEPOINT write" if outcome == "conflict" else "RELEASE SAVEPOINT write")
+                        outcomes[write["idempotency_key"]] = outcome
+                    except Exception as e:
+                        cur.execute("ROLLBACK TO SAVEPOINT write")
+                        outcomes[write["idempotency_key"]] = e
+            conn.commit()
+        finally:
+            conn.close()
+
+    queue = _connect(path)
+    try:
+        queue.execute("BEGIN")
+        for key, outcome in outcomes.items():
+            if outcome in ("applied", "duplicate"):
+                queue.execute("DELETE FROM task_writes WHERE idempotency_key = ?", (key,))
+            elif outcome == "conflict":
+                queue.execute("UPDATE task_writes SET status = 'conflict', last_error = ? WHERE idempotency_key = ?",
+                              ("task changed in the database since it was opened", key))
+            else:
+                queue.execute(
+                    "UPDATE task_writes SET attempts = attempts + 1, last_error = ?, "
+                    "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE status END WHERE idempotency_key = ?",
+                    (str(outcome), MAX_ATTEMPTS, key),
+                )
+        queue.execute("COMMIT")
+    finally:
+        queue.close()
+
+    summary = {}
+    for outcome in outcomes.values():
+        label = outcome if isinstance(outcome, str) else "error"
+        summary[label] = summary.get(label, 0) + 1
+    return summary
+
+
+def _purge_conflicts(path, retention=CONFLICT_RETENTION):
+    """Drop conflicts and failed writes nobody resolved in time (their session has most likely ended)"""
+    cutoff = (datetime.datetime.now() - retention).isoformat(timespec="seconds")
+    conn = _connect(path)
+    try:
+        conn.execute("DELETE FROM task_writes WHERE status IN ('conflict', 'failed') AND enqueued_at < ?", (cutoff,))
+    finally:
+        conn.close()
+
+
+def _flush_loop(path):
+    while True:
+        _wakeup.wait(FLUSH_INTERVAL)
+        _wakeup.clear()
+        try:
+            while _drain(path):
+                pass
+        except Exception:
+            pass  # DB down or circuit open: keep the writes, try again on the next tick
+
+
+def _drain(path):
+    """Flush one batch; True while full batches keep going through"""
+    summary = flush(path)
+    return sum(summary.values()) >= BATCH_SIZE and "error" not in summary
+
+
+def start_flusher(path=QUEUE_FILE):
+    """Start the process-wide background flusher once"""
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_flush_loop, args=(path,), daemon=True, name="task-write-flusher")
+            _flusher.start()
+    _wakeup.set()